@@ -0,0 +1,41 @@
+// Clientside callbacks (served with the other assets): presentation-only toggles that need no round
+// trip to the server, registered with ClientsideFunction('dashboard', <name>)
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        // Manual tab: the dropdown for an existing threat actor, or the label and input for a new one
+        apt_inputs: function (selection) {
+            var shown = {'display': 'block'};
+            var hidden = {'display': 'none'};
+            if (selection === 'existing') {
+                return [shown, hidden, hidden];
+            }
+            return [hidden, shown, shown];
+        },
+
+        // Visualisation tab: the group whose button has the most clicks, and the style of the CVE, APT,
+        // CWE, platform and technique dropdowns it shows. Nothing changes, and the server is not asked
+        // for the group's graphs, while the group stays the same.
+        visual_group: function (cve_clicks, apt_clicks, cwe_clicks, group) {
+            var next = null;
+            if (cve_clicks && cve_clicks > apt_clicks && cve_clicks > cwe_clicks) {
+                next = 'cve';
+            } else if (apt_clicks && apt_clicks > cve_clicks && apt_clicks > cwe_clicks) {
+                next = 'apt';
+            } else if (cwe_clicks && cwe_clicks > cve_clicks && cwe_clicks > apt_clicks) {
+                next = 'cwe';
+            }
+            if (next === (group || null)) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            var dropdowns = {
+                'cve': ['cve', 'technique'],
+                'apt': ['apt', 'platform'],
+                'cwe': ['cwe', 'platform']
+            }[next] || [];
+            var styles = ['cve', 'apt', 'cwe', 'platform', 'technique'].map(function (dropdown) {
+                return {'display': dropdowns.indexOf(dropdown) >= 0 ? 'block' : 'none'};
+            });
+            return [next].concat(styles);
+        }
+    }
+});
@@ -0,0 +1,64 @@
+# Time to filter the frame on the Visualisation dropdowns, on synthetic datasets at 1x, 10x and 100x:
+# chained isin scans (one per dropdown) against the filter index (filter_index.py), for a few typical
+# selections. The index should cost about the same at every scale, the scans grow with the frame.
+# Also the time to count the rows behind every option of every dropdown (the facet counts).
+# Run from the repository root: python -m benchmark.filter_index_benchmark [--scales 1 10 100]
+import argparse
+import statistics
+import time
+
+from benchmark.synthetic import default_rows, synthetic_dataset
+from dataset import compact_frame
+from filter_index import build_filter_index, facet_counts, filter_rows
+from platform_table import build_platform_table
+from visualisation import filter_dimensions
+
+
+def scan(df, selections):
+    for name, values in selections.items():
+        if values:
+            df = df[df[filter_dimensions[name]].isin(values)]
+    return df
+
+
+# Selections of the dropdowns: a rare APT, two busy APTs, three CVEs with one technique, and a busy
+# CWE with a rare CVE
+def selections(df):
+    ranked = {name: list(df[column].value_counts().index) for name, column in filter_dimensions.items()}
+    return {
+        'one rare apt': {'apt': ranked['apt'][-1:]},
+        'two busy apts': {'apt': ranked['apt'][:2]},
+        'three cves, one technique': {'cve': ranked['cve'][:3], 'technique': ranked['technique'][:1]},
+        'busy cwe, rare cve': {'cwe': ranked['cwe'][:1], 'cve': ranked['cve'][-1:]},
+    }
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dropdown filtering with isin scans and with the filter index')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--rows', type=int, default=default_rows, help='rows at scale 1')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'selection':<40} {'isin (ms)':>10} {'index (ms)':>11} {'facets (ms)':>12} {'rows':>8}")
+    for scale in args.scales:
+        df = compact_frame(synthetic_dataset(args.rows * scale))
+        platforms = build_platform_table(df)
+        start = time.perf_counter()
+        index = build_filter_index(df, filter_dimensions, {'platform': platforms})
+        print(f"{scale}x ({len(df)} rows): index built in {time.perf_counter() - start:.3f}s")
+        for name, selection in selections(df).items():
+            rows = len(filter_rows(index, df, selection))
+            scanned = measure(lambda: scan(df, selection), args.repeat)
+            indexed = measure(lambda: filter_rows(index, df, selection), args.repeat)
+            facets = measure(lambda: facet_counts(index, selection), args.repeat)
+            print(f"  {name:<38} {scanned * 1000:>10.2f} {indexed * 1000:>11.2f} {facets * 1000:>12.2f} {rows:>8}")
@@ -0,0 +1,76 @@
+# Benchmark of the novel.py forecast: the original iterrows() loop against forecast.forecast_threat_scores
+# on the current dataset and on copies with 10x and 100x as many threat actors.
+# Run from the repository root: python -m benchmark.forecast_benchmark
+import time
+
+import pandas as pd
+
+import novel
+from forecast import forecast_threat_scores, first_attacker_category
+
+
+# The loop novel.py used before the forecast was vectorized, kept as the reference implementation
+def legacy_forecast(df, df_final, df_avg_scores, initial_defense_score=1, defense_factor=0.5):
+    defense_scores = {year: initial_defense_score + defense_factor * (year - 2024) for year in range(2024, 2051)}
+    results = []
+
+    for year in range(2019, 2051):
+        for index, row in df_avg_scores.iterrows():
+            if year in range(2019, 2024):
+                probability = row['Complexity'] * row['Prevalence']
+            else:
+                attack_factor = 1 + 0.05 * (year - 2024)
+                current_complexity = row['Complexity'] * attack_factor
+                current_prevalence = row['Prevalence'] * attack_factor
+                probability = ((current_complexity * current_prevalence * df_final['vulnerability-score'].mean()) /
+                               defense_scores[year])
+
+            results.append({
+                'Year': year,
+                'Threat Actor': row['apt'],
+                'Complexity': row['Complexity'],
+                'Prevalence': row['Prevalence'],
+                'Probability': probability,
+                'Attacker Category': df.loc[df['apt'] == row['apt'], 'attacker-category'].iloc[0]
+            })
+
+    df_results = pd.DataFrame(results)
+    min_probability = df_results['Probability'].min()
+    max_probability = df_results['Probability'].max()
+    df_results['Probability_Percentage'] = ((df_results['Probability'] - min_probability) /
+                                            (max_probability - min_probability)) * 100
+    return df_results
+
+
+# Copy the dataset and the per-APT averages 'scale' times under new APT names
+def scale_inputs(scale):
+    novel_df = novel.registry.current().df
+    novel_final, novel_avg_scores = novel.novel_scores(novel_df)
+    frames, avg_frames = [], []
+    for i in range(scale):
+        suffix = '' if i == 0 else f'-{i}'
+        frames.append(novel_df.assign(apt=novel_df['apt'] + suffix))
+        avg_frames.append(novel_avg_scores.assign(apt=novel_avg_scores['apt'] + suffix))
+    df = pd.concat(frames, ignore_index=True)
+    df_final = pd.concat([novel_final] * scale, ignore_index=True)
+    return df, df_final, pd.concat(avg_frames, ignore_index=True)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def vectorized_forecast(df, df_final, df_avg_scores):
+    return forecast_threat_scores(df_avg_scores, first_attacker_category(df), df_final['vulnerability-score'].mean())
+
+
+if __name__ == '__main__':
+    print(f"{'actors':>8} {'loop (s)':>10} {'vectorized (s)':>15} {'speedup':>9}")
+    for scale in (1, 10, 100):
+        inputs = scale_inputs(scale)
+        expected, loop_time = timed(legacy_forecast, *inputs)
+        actual, vector_time = timed(vectorized_forecast, *inputs)
+        pd.testing.assert_frame_equal(actual, expected)
+        print(f"{len(inputs[2]):>8} {loop_time:>10.3f} {vector_time:>15.4f} {loop_time / vector_time:>8.0f}x")
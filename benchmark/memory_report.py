@@ -0,0 +1,112 @@
+# Memory of a dashboard worker with and without the compact dataset types (dataset.compact_frame):
+# the resident set size of a fresh process once it has warmed up and rendered every tab, as a gunicorn
+# worker would after its first requests, and the size of its dataset frame. The same is measured on
+# synthetic datasets at 1x, 10x and 100x the size of the workbook, in a process that loads one from
+# Parquet and builds the Visualisation, scoring, Summary and forecast tables of it.
+# Every figure is the median of --runs processes.
+# Run from the repository root: python -m benchmark.memory_report [--scales 1 10 100]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmark.synthetic import default_rows, synthetic_dataset
+
+tabs = ['summary-tab', 'auto-tab', 'manual-tab', 'novelty-tab', 'visualisation-tab']
+
+# Runs in the child process; prints the measures as JSON on its last line
+probe = """
+import json, sys, threading
+import combined_dashboard
+for thread in threading.enumerate():
+    if thread.name == 'dashboard-warm-up':
+        thread.join()
+client = combined_dashboard.app.server.test_client()
+client.get('/')
+for tab in sys.argv[1:]:
+    response = client.post('/_dash-update-component', json={
+        'output': 'tabs-content.children', 'outputs': {'id': 'tabs-content', 'property': 'children'},
+        'inputs': [{'id': 'tabs', 'property': 'value', 'value': tab}], 'changedPropIds': ['tabs.value']})
+    assert response.status_code == 200, response.status_code
+import visualisation
+from benchmark.memory_report import frame_bytes, rss_bytes
+print(json.dumps({'rss': rss_bytes(), 'frame': frame_bytes(visualisation.registry.current().df)}))
+"""
+
+
+# Same for the tables built on a synthetic dataset loaded from a Parquet file like the workbook's cache
+scaled_probe = """
+import json, sys
+import dataset, novel, visualisation
+from benchmark.memory_report import frame_bytes, rss_bytes
+from registry import Snapshot
+from scoring import ThreatActorScoreState
+from summary_metrics import SummaryMetrics
+df = dataset._read_parquet(sys.argv[1])
+Snapshot(visualisation.registry, 'synthetic', df).warm_up()
+tables = [ThreatActorScoreState(df), SummaryMetrics(df), novel.build_forecast(df)]
+print(json.dumps({'rss': rss_bytes(), 'frame': frame_bytes(df)}))
+"""
+
+
+# Resident set size of this process
+def rss_bytes():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource  # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# Size of a frame, counting every string (shared strings are counted once per row)
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def measure(code, arguments, compact, runs):
+    samples = [_measure(code, arguments, compact) for _ in range(runs)]
+    return {name: statistics.median(sample[name] for sample in samples) for name in samples[0]}
+
+
+def _measure(code, arguments, compact):
+    env = {**os.environ, 'DATASET_COMPACT': '1' if compact else '0', 'RENDER_WORKERS': '0',
+           'PYTHONPATH': os.getcwd()}
+    result = subprocess.run([sys.executable, '-c', code, *arguments], capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f"dashboard failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def mb(size):
+    return f"{size / 2 ** 20:.1f} MB"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Memory of the dashboard with and without compact dataset types')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--rows', type=int, default=default_rows, help='rows at scale 1')
+    parser.add_argument('--runs', type=int, default=3, help='processes per measurement (median is reported)')
+    args = parser.parse_args()
+
+    measure(probe, tabs, True, 1)  # Let the first run fill the caches (Parquet copies, scores, maps)
+    before, after = measure(probe, tabs, False, args.runs), measure(probe, tabs, True, args.runs)
+    print(f"{'dashboard worker':<28} {'RSS before':>11} {'RSS after':>11} {'frame before':>13} {'frame after':>12}")
+    print(f"{'workbook':<28} {mb(before['rss']):>11} {mb(after['rss']):>11} {mb(before['frame']):>13} "
+          f"{mb(after['frame']):>12}")
+
+    with tempfile.TemporaryDirectory(prefix='memory-') as directory:
+        for scale in args.scales:
+            path = os.path.join(directory, f"synthetic-{scale}.parquet")
+            synthetic_dataset(args.rows * scale).to_parquet(path, index=False)
+            before = measure(scaled_probe, [path], False, args.runs)
+            after = measure(scaled_probe, [path], True, args.runs)
+            print(f"{f'synthetic {scale}x ({args.rows * scale} rows)':<28} {mb(before['rss']):>11} "
+                  f"{mb(after['rss']):>11} {mb(before['frame']):>13} {mb(after['frame']):>12}")
@@ -0,0 +1,76 @@
+# Wall-clock time of a render of the APT group of the Visualisation tab (its seven figures), on a
+# synthetic dataset: one figure after another, as concurrent callbacks in this process (the GIL
+# serializes the builders) and as concurrent callbacks handed to warm render workers (render_pool).
+# With enough workers the group should take about as long as its slowest figure.
+# Each run selects other APTs, so the network layouts are never cached.
+# Run from the repository root: python -m benchmark.render_pool_benchmark [--rows 20000] [--workers 4]
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import render_pool
+import visualisation
+from benchmark.synthetic import default_rows, synthetic_dataset
+from registry import Snapshot
+
+group = ['apt-platform-stacked-bar-chart', 'apt-technique-tactic-network', 'apt-technique-tactic-cve-network',
+         'apt-technique-tactic-chart', 'apt-technique-network', 'apt-cvss-heatmap', 'apt-cvss-bubble-chart']
+
+
+def values(graph_id, apts):
+    return [apts if dropdown_id == 'apt-filter-dropdown' else None
+            for dropdown_id in visualisation.visual_figures[graph_id][0]]
+
+
+def render(snapshot, graph_id, apts):
+    start = time.perf_counter()
+    render_pool.render(visualisation.render_visual_figure, snapshot, graph_id, values(graph_id, apts))
+    return time.perf_counter() - start
+
+
+# Seconds for the whole group and for each figure
+def render_group(snapshot, apts, concurrent):
+    start = time.perf_counter()
+    if concurrent:
+        with ThreadPoolExecutor(max_workers=len(group)) as threads:
+            timings = list(threads.map(lambda graph_id: render(snapshot, graph_id, apts), group))
+    else:
+        timings = [render(snapshot, graph_id, apts) for graph_id in group]
+    return time.perf_counter() - start, timings
+
+
+def measure(snapshot, selections, concurrent):
+    runs = [render_group(snapshot, apts, concurrent) for apts in selections]
+    return statistics.median(total for total, _ in runs), statistics.median(max(timings) for _, timings in runs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='APT group render time with and without the render pool')
+    parser.add_argument('--rows', type=int, default=default_rows * 10)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_dataset(args.rows)
+    snapshot = Snapshot(visualisation.registry, f"synthetic-{args.rows}", df)
+    snapshot.warm_up()
+    busiest = list(df['apt'].value_counts().index)
+    # Three APTs per run, different ones for every run and mode
+    selections = [busiest[3 * i:3 * i + 3] for i in range(3 * args.repeat)]
+
+    results = {}
+    render_pool.render_workers = 0
+    results['serial'] = measure(snapshot, selections[:args.repeat], False)
+    results['threads'] = measure(snapshot, selections[args.repeat:2 * args.repeat], True)
+    render_pool.render_workers = args.workers
+    start = time.perf_counter()
+    wait(render_pool.warm_up('visualisation', snapshot))
+    print(f"{args.workers} render workers warmed up in {time.perf_counter() - start:.1f}s")
+    results[f"pool ({args.workers})"] = measure(snapshot, selections[2 * args.repeat:], True)
+    os.remove(render_pool._export(snapshot))  # The synthetic snapshot handed to the workers
+
+    print(f"{'APT group, ' + str(args.rows) + ' rows':<28} {'group (s)':>10} {'slowest figure (s)':>19}")
+    for mode, (total, slowest) in results.items():
+        print(f"{mode:<28} {total:>10.3f} {slowest:>19.3f}")
@@ -0,0 +1,191 @@
+# Server requests made by a scripted user session of the dashboard: open it, switch tabs, toggle the
+# Manual tab's threat actor inputs, pick Visualisation groups (clicking the current one again) and filter.
+# The dash-renderer is replayed against the Flask test client: the callbacks of /_dash-dependencies fire
+# on the same triggers as in the browser (initial calls of inserted components, inputs changed by the
+# user or by other callbacks), server callbacks are posted to /_dash-update-component and counted, and
+# clientside callbacks run in node (assets/clientside.js) without a request.
+# Compare revisions by running it on each: python -m benchmark.session_requests [--verbose]
+import argparse
+import json
+import os
+import subprocess
+from collections import Counter
+
+import render_pool
+
+assets_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets')
+
+# (component id, property, value) set by the user, one step after another
+session = [
+    ('tabs', 'value', 'manual-tab'),
+    ('apt-selection', 'value', 'new'),
+    ('apt-selection', 'value', 'existing'),
+    ('apt-selection', 'value', 'new'),
+    ('apt-selection', 'value', 'existing'),
+    ('tabs', 'value', 'visualisation-tab'),
+    ('apt-button', 'n_clicks', 1),
+    ('apt-button', 'n_clicks', 2),  # The group already shown
+    ('apt-filter-dropdown', 'value', ['APT28']),
+    ('cve-button', 'n_clicks', 1),  # Still fewer clicks than APT: the group does not change
+    ('cve-button', 'n_clicks', 2),  # As many: no group
+    ('cve-button', 'n_clicks', 3),
+    ('cve-button', 'n_clicks', 4),  # The group already shown
+    ('tabs', 'value', 'summary-tab'),
+]
+
+# Runs one clientside function of the assets, printing its result (or a marker when it prevents the update)
+node_runner = """
+const fs = require('fs');
+const [directory, namespace, name, args] = process.argv.slice(1);
+global.window = {dash_clientside: {no_update: {no_update: true}, PreventUpdate: {prevent_update: true}}};
+for (const file of fs.readdirSync(directory).filter(file => file.endsWith('.js'))) {
+    eval(fs.readFileSync(`${directory}/${file}`, 'utf8'));
+}
+try {
+    console.log(JSON.stringify(window.dash_clientside[namespace][name](...JSON.parse(args))));
+} catch (error) {
+    if (error !== window.dash_clientside.PreventUpdate) throw error;
+    console.log(JSON.stringify({prevent_update: true}));
+}
+"""
+
+
+class Browser:
+    def __init__(self, app):
+        self.client = app.server.test_client()
+        self.props = {}  # component id -> props
+        self.inside = {}  # component id -> ids of the components in its children
+        self.requests = Counter()  # server callback output -> requests
+        self.verbose = False
+        self.callbacks = self.client.get('/_dash-dependencies').get_json()
+        for callback in self.callbacks:
+            output = callback['output']
+            callback['outputs'] = [tuple(part.rsplit('.', 1)) for part in
+                                   (output[2:-2].split('...') if output.startswith('..') else [output])]
+
+    def load(self):
+        layout = self.client.get('/_dash-layout').get_json()
+        self.run(self.initial_calls(self.insert(None, layout)))
+
+    # The user sets a property
+    def set(self, component_id, prop, value):
+        self.props[component_id][prop] = value
+        self.run(self.triggered({(component_id, prop)}))
+
+    # Register the components of a layout chunk; returns their ids
+    def insert(self, parent, chunk):
+        ids = set()
+        stack = [chunk]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, dict) and 'props' in node:
+                props = node['props']
+                if 'id' in props:
+                    self.props[props['id']] = props
+                    ids.add(props['id'])
+                stack.append(props.get('children'))
+                stack.extend(value for value in props.values() if isinstance(value, dict) and 'props' in value)
+        if parent is not None:
+            self.inside[parent] = ids
+        return ids
+
+    def remove(self, parent):
+        for component_id in self.inside.pop(parent, ()):
+            self.remove(component_id)
+            self.props.pop(component_id, None)
+
+    def present(self, callback):
+        ids = [component_id for component_id, _ in callback['outputs']] + [item['id'] for item in callback['inputs']]
+        return all(component_id in self.props for component_id in ids)
+
+    # Callbacks firing because a chunk was inserted: an input or output in it, unless prevent_initial_call
+    def initial_calls(self, ids):
+        return [callback for callback in self.callbacks
+                if not callback.get('prevent_initial_call') and self.present(callback)
+                and (any(component_id in ids for component_id, _ in callback['outputs'])
+                     or any(item['id'] in ids for item in callback['inputs']))]
+
+    def triggered(self, changed):
+        return [callback for callback in self.callbacks if self.present(callback)
+                and any((item['id'], item['property']) in changed for item in callback['inputs'])]
+
+    # Fire callbacks like the renderer: one waits while another pending callback outputs one of its inputs
+    def run(self, pending):
+        while pending:
+            outputs = {output for callback in pending for output in callback['outputs']}
+            ready = [callback for callback in pending
+                     if not any((item['id'], item['property']) in outputs and
+                                (item['id'], item['property']) not in callback['outputs']
+                                for item in callback['inputs'])] or pending[:1]
+            for callback in ready:
+                pending.remove(callback)
+                changed, inserted = self.call(callback)
+                for following in self.triggered(changed) + self.initial_calls(inserted):
+                    if following not in pending:
+                        pending.append(following)
+
+    def values(self, items):
+        return [dict(item, value=self.props[item['id']].get(item['property'])) for item in items]
+
+    # Run a callback; returns the properties it changed and the ids of the components it inserted
+    def call(self, callback):
+        inputs, state = self.values(callback['inputs']), self.values(callback['state'])
+        if callback.get('clientside_function'):
+            function = callback['clientside_function']
+            result = json.loads(subprocess.run(
+                ['node', '-e', node_runner, assets_dir, function['namespace'], function['function_name'],
+                 json.dumps([item['value'] for item in inputs + state])],
+                capture_output=True, text=True, check=True).stdout)
+            if isinstance(result, dict) and result.get('prevent_update'):
+                return set(), set()
+            values = result if len(callback['outputs']) > 1 else [result]
+            updates = {output: value for output, value in zip(callback['outputs'], values)
+                       if not (isinstance(value, dict) and value.get('no_update'))}
+        else:
+            outputs = [{'id': component_id, 'property': prop} for component_id, prop in callback['outputs']]
+            response = self.client.post('/_dash-update-component', json={
+                'output': callback['output'], 'outputs': outputs if len(outputs) > 1 else outputs[0],
+                'inputs': inputs, 'state': state,
+                'changedPropIds': [f"{item['id']}.{item['property']}" for item in inputs]})
+            self.requests[callback['output']] += 1
+            if self.verbose:
+                print(f"  request {callback['output'][:70]} -> {response.status_code}")
+            if response.status_code == 204:
+                return set(), set()
+            assert response.status_code == 200, response.get_data(as_text=True)[-500:]
+            updates = {(component_id, prop): value
+                       for component_id, props in response.get_json()['response'].items()
+                       for prop, value in props.items()}
+        inserted = set()
+        for (component_id, prop), value in updates.items():
+            if component_id not in self.props:
+                continue
+            self.props[component_id][prop] = value
+            if prop == 'children':
+                self.remove(component_id)
+                inserted |= self.insert(component_id, value)
+        return set(updates), inserted
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Server requests of a scripted dashboard session')
+    parser.add_argument('--verbose', action='store_true', help='print every request')
+    args = parser.parse_args()
+
+    render_pool.render_workers = 0
+    import combined_dashboard
+
+    browser = Browser(combined_dashboard.app)
+    browser.verbose = args.verbose
+    browser.load()
+    print(f"{'step':<48} {'requests':>8}")
+    print(f"{'page load':<48} {sum(browser.requests.values()):>8}")
+    for component_id, prop, value in session:
+        before = sum(browser.requests.values())
+        browser.set(component_id, prop, value)
+        print(f"{f'{component_id}.{prop} = {value}':<48} {sum(browser.requests.values()) - before:>8}")
+    print(f"{'session':<48} {sum(browser.requests.values()):>8}")
+    for output, count in browser.requests.most_common():
+        print(f"  {count:>4}  {output[:90]}")
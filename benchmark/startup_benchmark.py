@@ -0,0 +1,90 @@
+# Time to first response of the dashboard, each run in a fresh process:
+# import = importing combined_dashboard, first page = GET / right after it,
+# first tab = the first render of each tab (the page, then the tab callback).
+# With --ref, the same is measured on another git revision (e.g. the commit before lazy initialization),
+# checked out into a temporary directory that shares the workbooks, shapefile and .cache of this one.
+# Run from the repository root: python -m benchmark.startup_benchmark [--ref <git revision>] [--runs 3]
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+tabs = ['summary-tab', 'auto-tab', 'manual-tab', 'novelty-tab', 'visualisation-tab']
+
+# Runs in the child process; prints the timings as JSON on its last line
+probe = """
+import json, sys, time
+start = time.perf_counter()
+import combined_dashboard
+timings = {'import': time.perf_counter() - start}
+client = combined_dashboard.app.server.test_client()
+client.get('/')
+timings['first page'] = time.perf_counter() - start
+tab = sys.argv[1]
+if tab:
+    response = client.post('/_dash-update-component', json={
+        'output': 'tabs-content.children', 'outputs': {'id': 'tabs-content', 'property': 'children'},
+        'inputs': [{'id': 'tabs', 'property': 'value', 'value': tab}], 'changedPropIds': ['tabs.value']})
+    assert response.status_code == 200, response.status_code
+    timings[tab] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def measure(directory, tab, runs):
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', probe, tab], cwd=directory, capture_output=True, text=True,
+                                env={**os.environ, 'PYTHONPATH': directory})
+        if result.returncode != 0:
+            raise RuntimeError(f"startup failed in {directory}:\n{result.stderr[-2000:]}")
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {name: statistics.median(sample[name] for sample in samples) for name in samples[0]}
+
+
+def measure_all(directory, runs):
+    timings = measure(directory, '', runs)
+    for tab in tabs:
+        timings[tab] = measure(directory, tab, runs)[tab]
+    return timings
+
+
+# Export a revision next to the current tree, linking in everything git does not track (data, caches)
+def checkout(ref):
+    directory = tempfile.mkdtemp(prefix='startup-')
+    archive = subprocess.run(['git', 'archive', ref], capture_output=True, check=True).stdout
+    subprocess.run(['tar', '-x', '-C', directory], input=archive, check=True)
+    link_missing('.', directory)
+    return directory
+
+
+def link_missing(source, target):
+    for name in os.listdir(source):
+        source_path, target_path = os.path.join(source, name), os.path.join(target, name)
+        if not os.path.lexists(target_path):
+            os.symlink(os.path.abspath(source_path), target_path)
+        elif os.path.isdir(source_path) and os.path.isdir(target_path) and name != '.git':
+            link_missing(source_path, target_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time to first response of the dashboard')
+    parser.add_argument('--ref', help='git revision to compare against')
+    parser.add_argument('--runs', type=int, default=3, help='processes per measurement (median is reported)')
+    args = parser.parse_args()
+
+    results = {'current': measure_all(os.getcwd(), args.runs)}
+    if args.ref:
+        directory = checkout(args.ref)
+        try:
+            results[args.ref] = measure_all(directory, args.runs)
+        finally:
+            shutil.rmtree(directory)
+
+    print(f"{'seconds until':<20}" + ''.join(f"{name:>14}" for name in results))
+    for step in results['current']:
+        print(f"{step:<20}" + ''.join(f"{timings[step]:>14.2f}" for timings in results.values()))
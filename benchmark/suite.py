@@ -0,0 +1,185 @@
+# Benchmark suite of the scoring, forecasting and figure-building hot paths on synthetic datasets
+# (benchmark/synthetic.py) at 1x, 10x and 100x the size of the CleanedDataset sheet: the Autonomous
+# tab scores, the Novelty forecast, every diagram.create_* builder, summary_layout and create_region_map.
+# Each case reports the median of a few runs with the in-process caches cleared between runs.
+# Results are written to benchmark/results/<name>.json; the run is compared with
+# benchmark/results/baseline.json (written by --save-baseline) and cases slower than the baseline by
+# more than --threshold are reported as regressions (exit status 1).
+# Run from the repository root: python -m benchmark.suite [--scales 1 10 100] [--only diagram] [--save-baseline]
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import geometry
+import graph_layout
+from benchmark.synthetic import default_rows, synthetic_dataset, synthetic_shapefile
+from diagram.APTTechniqueTacticChart import create_techniques_tactics_chart
+from diagram.Apt36AssociatedTechniques import create_apt_network_techniques
+from diagram.Apt36AssociatedTechniquesTactics import create_apt_network_techniques_tactics
+from diagram.Apt36AssociatedTechniquesTactics_2 import create_apt_network_techniques_tactics_cve
+from diagram.AptCVEBubbleChart import create_bubble_chart_apt_cvss
+from diagram.AptCVEHeatMap import create_heatmap_apt_cvss
+from diagram.AptPlatformStackedBarChart import create_apt_platform_stacked_bar_chart
+from diagram.AptRegionHeatMap import create_region_map
+from diagram.CVECWEBarChart import create_cve_cwe_bar_chart
+from diagram.CVECWEScatterPlot import create_cve_cwe_scatter_plot
+from diagram.CVETechniquesHeatmap import create_cve_technique_heatmap
+from diagram.CWEPlatformHeatmap import create_cwe_platform_heatmap
+from diagram.PlatformIoCStackedBarChart import create_platform_ioc_stacked_bar_chart
+from diagram.Top10AptPieChart import create_pie_chart
+from novel import build_forecast
+from scoring import ThreatActorScoreState, compute_threat_actor_scores
+from summary import summary_layout
+from summary_metrics import SummaryMetrics
+
+results_dir = os.path.join(os.path.dirname(__file__), 'results')
+# Differences below this many seconds are never reported, whatever the ratio
+noise_floor = 0.005
+
+
+# Inputs shared by the cases of one scale: the frame, the scatter rows of the Visualisation tab,
+# the three busiest APTs (the network graphs need a selection) and the synthetic shapefile
+def prepare(rows, shapefile):
+    df = synthetic_dataset(rows)
+    df_scatter = df[['cve', 'cwe-id', 'cvss-base-score']].dropna()
+    df_scatter['cwe_num'] = pd.factorize(df_scatter['cwe-id'])[0]
+    return {'df': df, 'df_scatter': df_scatter, 'apts': list(df['apt'].value_counts().index[:3]),
+            'shapefile': shapefile}
+
+
+cases = {
+    'scoring.compute_threat_actor_scores': lambda data: compute_threat_actor_scores(data['df']),
+    'scoring.ThreatActorScoreState': lambda data: ThreatActorScoreState(data['df']).table(),
+    'novel.build_forecast': lambda data: build_forecast(data['df']),
+    'diagram.create_techniques_tactics_chart': lambda data: create_techniques_tactics_chart(data['df']),
+    'diagram.create_apt_network_techniques': lambda data: create_apt_network_techniques(data['df'], data['apts']),
+    'diagram.create_apt_network_techniques_tactics':
+        lambda data: create_apt_network_techniques_tactics(data['df'], data['apts']),
+    'diagram.create_apt_network_techniques_tactics_cve':
+        lambda data: create_apt_network_techniques_tactics_cve(data['df'], data['apts']),
+    'diagram.create_bubble_chart_apt_cvss': lambda data: create_bubble_chart_apt_cvss(data['df']),
+    'diagram.create_heatmap_apt_cvss': lambda data: create_heatmap_apt_cvss(data['df']),
+    'diagram.create_apt_platform_stacked_bar_chart': lambda data: create_apt_platform_stacked_bar_chart(data['df']),
+    'diagram.create_region_map': lambda data: create_region_map(data['df'], data['shapefile']).get_root().render(),
+    'diagram.create_cve_cwe_bar_chart': lambda data: create_cve_cwe_bar_chart(data['df']),
+    'diagram.create_cve_cwe_scatter_plot': lambda data: create_cve_cwe_scatter_plot(data['df_scatter']),
+    'diagram.create_cve_technique_heatmap': lambda data: create_cve_technique_heatmap(data['df']),
+    'diagram.create_cwe_platform_heatmap': lambda data: create_cwe_platform_heatmap(data['df']),
+    'diagram.create_platform_ioc_stacked_bar_chart': lambda data: create_platform_ioc_stacked_bar_chart(data['df']),
+    'diagram.create_pie_chart': lambda data: create_pie_chart(data['df']),
+    'summary.summary_layout': lambda data: summary_layout(SummaryMetrics(data['df']), data['shapefile']),
+}
+
+
+# Forget what earlier runs left behind: network layouts and the rendered region map pages
+def clear_caches():
+    with graph_layout._lock:
+        graph_layout._layouts.clear()
+        graph_layout._known_positions.clear()
+    for page in glob.glob(os.path.join(geometry.geometry_dir, 'region-map-*.html')):
+        os.remove(page)
+
+
+def measure(case, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        case(data)
+        timings.append(time.perf_counter() - start)
+    return {'median': statistics.median(timings), 'min': min(timings), 'runs': repeat}
+
+
+def base_rows():
+    from dataset import load_dataset
+    try:
+        return len(load_dataset())
+    except OSError:  # No workbook here
+        return default_rows
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# Cases whose median grew by more than threshold (and noise_floor) compared with the baseline
+def regressions(results, baseline, threshold):
+    if baseline is None:
+        return []
+    found = []
+    for scale, timings in results['scales'].items():
+        previous = baseline['scales'].get(scale)
+        if previous is None or previous['rows'] != timings['rows']:
+            continue  # Not the same dataset, nothing to compare with
+        for name, timing in timings['cases'].items():
+            before = previous['cases'].get(name)
+            if before is None:
+                continue
+            if timing['median'] > before['median'] * (1 + threshold) and timing['median'] - before['median'] > noise_floor:
+                found.append((scale, name, before['median'], timing['median']))
+    return found
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of the scoring, forecast and figure builders')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--rows', type=int, help='rows at scale 1 (default: the size of the workbook)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case (1 at scale 100 and above)')
+    parser.add_argument('--only', help='run the cases whose name contains this text')
+    parser.add_argument('--name', help='name of the result file (default: the git revision)')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown reported as a regression')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    args = parser.parse_args()
+
+    selected = {name: case for name, case in cases.items() if not args.only or args.only in name}
+    rows = args.rows or base_rows()
+    results = {'revision': git_revision(), 'python': sys.version.split()[0], 'machine': platform.machine(),
+               'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'scales': {}}
+
+    # Keep the geometry caches and region map pages of the benchmark away from the dashboard's
+    with tempfile.TemporaryDirectory(prefix='benchmark-') as directory:
+        geometry.geometry_dir = os.path.join(directory, 'geometry')
+        shapefile = synthetic_shapefile(os.path.join(directory, 'shapefile'))
+        for scale in args.scales:
+            data = prepare(rows * scale, shapefile)
+            repeat = 1 if scale >= 100 else args.repeat
+            timings = {}
+            for name, case in selected.items():
+                timings[name] = measure(case, data, repeat)
+                print(f"{scale:>4}x {name:<50} {timings[name]['median']:>9.3f}s")
+            results['scales'][str(scale)] = {'rows': rows * scale, 'cases': timings}
+
+    write_json(os.path.join(results_dir, f"{args.name or results['revision']}.json"), results)
+    baseline_file = os.path.join(results_dir, 'baseline.json')
+    if args.save_baseline:
+        write_json(baseline_file, results)
+
+    baseline = None
+    if os.path.exists(baseline_file) and not args.save_baseline:
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+    found = regressions(results, baseline, args.threshold)
+    for scale, name, before, after in found:
+        print(f"REGRESSION {scale}x {name}: {before:.3f}s -> {after:.3f}s ({after / before - 1:+.0%})")
+    if baseline is not None and not found:
+        print(f"No regression against the baseline ({baseline['revision']}, {baseline['time']})")
+    sys.exit(1 if found else 0)
@@ -0,0 +1,109 @@
+# Synthetic datasets shaped like the CleanedDataset sheet: the columns the dashboard reads, with value
+# ranges and skew close to the real ones (a few APTs, techniques and CVEs account for most rows, about
+# half of the rows have no CVE). The number of APTs, CVEs, techniques and CWEs grows with the row count,
+# capped where the real catalogues are (ATT&CK techniques and tactics, CWE).
+# Also builds a shapefile of box-shaped countries named after the regions of the dataset.
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rows of the dataset the 1x scale stands for when the workbook is not available
+default_rows = 2000
+
+tactics = [('TA0001', 'Initial Access'), ('TA0002', 'Execution'), ('TA0003', 'Persistence'),
+           ('TA0004', 'Privilege Escalation'), ('TA0005', 'Defense Evasion'), ('TA0006', 'Credential Access'),
+           ('TA0007', 'Discovery'), ('TA0008', 'Lateral Movement'), ('TA0009', 'Collection'),
+           ('TA0010', 'Exfiltration'), ('TA0011', 'Command and Control'), ('TA0040', 'Impact'),
+           ('TA0042', 'Resource Development'), ('TA0043', 'Reconnaissance')]
+platform_sets = ['Linux, Windows, macOS', 'Windows', 'Linux, Windows, macOS, Network', 'IaaS, Linux, SaaS, Windows, macOS',
+                 'Azure AD, Containers, Google Workspace, IaaS, Linux, Network, Office 365, SaaS, Windows, macOS',
+                 'Windows, macOS', 'Android, iOS', 'Network', 'Linux, macOS', 'Containers, IaaS, Linux']
+regions = ['Russia', 'China', 'Iran', 'North Korea', 'United States of America', 'Israel', 'India', 'Pakistan',
+           'Vietnam', 'Ukraine', 'Turkey', 'Lebanon', 'Nigeria', 'Brazil', 'Colombia', 'Unknown']
+attacker_categories = ['Cyber Espionage', 'Financially Motivated', 'Hacktivist', 'Nation State', 'Cyber Crime']
+severities = np.array(['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'], dtype=object)  # CVSS from 0, 4, 7 and 9
+
+
+# Popularity weights: item i is drawn proportionally to 1 / (i + 1) ** exponent
+def _skewed(rng, n, size, exponent=0.9):
+    weights = 1 / np.arange(1, n + 1) ** exponent
+    return rng.choice(n, size=size, p=weights / weights.sum())
+
+
+def synthetic_dataset(rows=default_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    n_apts = max(10, rows // 45)
+    n_cves = max(20, rows // 15)
+    n_techniques = min(max(50, rows // 10), 700)
+    n_cwes = min(max(20, rows // 40), 900)
+
+    # Per APT: origin region, category, IoC weight
+    apt_names = np.array([f"APT{i}" for i in range(n_apts)], dtype=object)
+    apt_region = rng.integers(0, len(regions), n_apts)
+    region_weight = rng.uniform(0.5, 32, len(regions)).round(6)
+    region_count = rng.integers(1, 12, len(regions))
+    apt_category = rng.integers(0, len(attacker_categories), n_apts)
+    apt_iocperc = rng.choice([0, 100, 250, 400, 700, 1000], n_apts).astype(float)
+
+    # Per technique: tactic and platforms; per CVE: CWE, CVSS, impact
+    technique_ids = np.array([f"T{1000 + i}" for i in range(n_techniques)], dtype=object)
+    technique_tactic = rng.integers(0, len(tactics), n_techniques)
+    technique_platforms = rng.integers(0, len(platform_sets), n_techniques)
+    cve_ids = np.array([f"CVE-{2010 + i % 14}-{10000 + i}" for i in range(n_cves)], dtype=object)
+    cve_cwe = _skewed(rng, n_cwes, n_cves)
+    cve_cvss = rng.uniform(2, 10, n_cves).round(1)
+    cve_impact = rng.choice([2, 4, 6, 7, 8, 10], n_cves)
+
+    apt = _skewed(rng, n_apts, rows, 0.6)
+    technique = _skewed(rng, n_techniques, rows)
+    has_cve = rng.random(rows) > 0.5
+    cve = _skewed(rng, n_cves, rows)
+    tactic = technique_tactic[technique]
+    days = rng.integers(10, 2520, rows)
+    cvss = np.where(has_cve, cve_cvss[cve], 0.0)  # Rows without a CVE score 0, like the workbook
+
+    df = pd.DataFrame({
+        'apt': apt_names[apt],
+        'technique-id': technique_ids[technique],
+        'group': apt_names[apt],
+        'region': np.array(regions, dtype=object)[apt_region[apt]],
+        'region-count': region_count[apt_region[apt]],
+        'region-weight': region_weight[apt_region[apt]],
+        'subtechnique-name': np.array([f"Sub-technique {i}" for i in range(250)], dtype=object)[
+            rng.integers(0, 250, rows)],
+        'days': days,
+        'time': days / 365,
+        'tactic-id': np.array([tactic_id for tactic_id, _ in tactics], dtype=object)[tactic],
+        'tactics': np.array([name for _, name in tactics], dtype=object)[tactic],
+        'tactic-weight': tactic + 1,
+        'platforms': np.array(platform_sets, dtype=object)[technique_platforms[technique]],
+        'platform-count': rng.integers(1, 4, rows),
+        'cve': np.where(has_cve, cve_ids[cve], 'UNKNOWN'),
+        'cve-year': np.where(has_cve, 2010 + cve % 14, 0),
+        'cvss-base-score': cvss,
+        'severity': np.where(has_cve, severities[np.digitize(cvss, [4, 7, 9])], 'NA - CRITICAL'),
+        'impact-score': np.where(has_cve, cve_impact[cve], 8),
+        'cwe-id': np.where(has_cve, np.array([f"CWE-{20 + i}" for i in range(n_cwes)], dtype=object)[cve_cwe[cve]],
+                           'UNKNOWN'),
+        'iocperc': apt_iocperc[apt],
+        'ioc-weight': apt_iocperc[apt] / 100,
+        'attacker-category': np.array(attacker_categories, dtype=object)[apt_category[apt]],
+        'defence-score': rng.integers(1, 4, rows),
+        'vulnerability-score': rng.integers(1, 3, rows),
+    })
+    return df
+
+
+# A shapefile with one box per region (a 4 x 4 grid), with the 'NAME' column of the Natural Earth file
+def synthetic_shapefile(directory):
+    import geopandas as gpd
+    from shapely.geometry import box
+
+    names = [region for region in regions if region != 'Unknown']
+    outlines = [box(-180 + 90 * (i % 4), -80 + 40 * (i // 4), -95 + 90 * (i % 4), -45 + 40 * (i // 4))
+                for i in range(len(names))]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'synthetic_countries.shp')
+    gpd.GeoDataFrame({'NAME': names}, geometry=outlines, crs='EPSG:4326').to_file(path)
+    return path
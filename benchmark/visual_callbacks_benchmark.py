@@ -0,0 +1,120 @@
+# Latency of a filter change in the Visualisation tab, before and after the per-figure callbacks, measured
+# end to end: callback requests are posted to /_dash-update-component through the Flask test client.
+# Before: one callback re-rendered every figure of the open group, one after another (rebuilt here on a
+# separate app, as it was). After: only the figures subscribed to the changed dropdown re-render, each in
+# its own callback, requested one after another (serial) or all at once from as many threads, like the
+# browser's concurrent requests to a threaded server (concurrent). With --render-workers 0 the concurrent
+# renders share the GIL of this process; with workers they are built in the render pool.
+# The figure cache is disabled so every render is measured cold.
+# Run from the repository root: python -m benchmark.visual_callbacks_benchmark [--render-workers N]
+import argparse
+import statistics
+import threading
+import time
+
+import dash
+from dash import dcc, html
+from dash.dependencies import Input, Output
+
+import figure_cache
+import render_pool
+from figure_cache import FigureCache
+
+# Filter changes to measure: (group, dropdown that moved)
+scenarios = [
+    ('cve', 'cve-filter-dropdown'),
+    ('cve', 'technique-selection-dropdown'),
+    ('apt', 'apt-filter-dropdown'),
+    ('apt', 'platform-selection-dropdown'),
+    ('cwe', 'cwe-filter-dropdown'),
+    ('cwe', 'platform-selection-dropdown'),
+]
+
+
+# The single callback of a group before: every figure of the group (and the CWE scatter plot), in one request
+def legacy_app(visualisation):
+    app = dash.Dash(__name__, suppress_callback_exceptions=True)
+    app.layout = html.Div()
+    for group, graph_ids in visualisation.figure_groups.items():
+        dropdown_ids = list(dict.fromkeys(dropdown_id for graph_id in graph_ids
+                                          for dropdown_id in visualisation.visual_figures[graph_id][0]))
+
+        def update(*values, group=group, graph_ids=graph_ids, dropdown_ids=dropdown_ids):
+            selections = dict(zip(dropdown_ids, values))
+            graphs = [dcc.Graph(id=graph_id, figure=visualisation.visual_figure(
+                graph_id, *[selections[dropdown_id] for dropdown_id in visualisation.visual_figures[graph_id][0]]))
+                for graph_id in graph_ids]
+            if group == 'cwe':
+                graphs.append(dcc.Graph(id='cwe-cve-scatter-plot', figure=visualisation.cwe_scatter_plot()))
+            return html.Div(graphs)
+
+        app.callback(Output(f'{group}-visual-content', 'children'),
+                     [Input(dropdown_id, 'value') for dropdown_id in dropdown_ids])(update)
+    return app
+
+
+def new_app(visualisation):
+    app = dash.Dash(__name__, suppress_callback_exceptions=True)
+    app.layout = visualisation.visual_layout()
+    visualisation.visual_callbacks(app)
+    return app
+
+
+# Post one callback request, its inputs all empty
+def post(client, output, dropdown_ids):
+    response = client.post('/_dash-update-component', json={
+        'output': output, 'outputs': dict(zip(('id', 'property'), output.rsplit('.', 1))),
+        'inputs': [{'id': dropdown_id, 'property': 'value', 'value': None} for dropdown_id in dropdown_ids],
+        'changedPropIds': [f'{dropdown_ids[0]}.value']})
+    assert response.status_code == 200, response.get_data(as_text=True)[-500:]
+
+
+def concurrently(requests):
+    threads = [threading.Thread(target=request) for request in requests]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def wall_time(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Visualisation filter change latency, one callback vs per figure')
+    parser.add_argument('--render-workers', type=int, default=0, help='render pool processes (default: 0)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    render_pool.render_workers = args.render_workers
+    import visualisation
+
+    figure_cache.figure_cache = FigureCache(0)  # No in-memory or shared cache
+    if args.render_workers:
+        for future in render_pool.warm_up(visualisation.__name__, visualisation.registry.current()):
+            future.result()
+    legacy, new = legacy_app(visualisation).server, new_app(visualisation).server
+
+    print(f"{'group':<6} {'changed dropdown':<30} {'before (s)':>11} {'after serial (s)':>17} "
+          f"{'after concurrent (s)':>21} {'figures':>8}")
+    for group, dropdown_id in scenarios:
+        graph_ids = visualisation.figure_groups[group]
+        legacy_dropdowns = list(dict.fromkeys(other for graph_id in graph_ids
+                                              for other in visualisation.visual_figures[graph_id][0]))
+        before = wall_time(lambda: post(legacy.test_client(), f'{group}-visual-content.children', legacy_dropdowns),
+                           args.repeat)
+        affected = [graph_id for graph_id in graph_ids if dropdown_id in visualisation.visual_figures[graph_id][0]]
+        requests = [lambda graph_id=graph_id: post(new.test_client(), f'{graph_id}.figure',
+                                                   visualisation.visual_figures[graph_id][0])
+                    for graph_id in affected]
+        after_serial = wall_time(lambda: [request() for request in requests], args.repeat)
+        after_concurrent = wall_time(lambda: concurrently(requests), args.repeat)
+        total = len(graph_ids) + (group == 'cwe')
+        print(f"{group.upper():<6} {dropdown_id:<30} {before:>11.3f} {after_serial:>17.3f} "
+              f"{after_concurrent:>21.3f} {len(affected):>4}/{total}")
@@ -0,0 +1,112 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Default shape limits of a heatmap: the k rows and columns with the most co-occurrences are kept,
+# and what is left is merged into bands so that no cell is smaller than min_cell_px on the figure
+top_k_rows = int(os.environ.get('HEATMAP_TOP_K_ROWS', 1000))
+top_k_columns = int(os.environ.get('HEATMAP_TOP_K_COLUMNS', 300))
+pixel_budget = (800, 1200)  # (height, width) of the plot area in pixels
+min_cell_px = 2
+# Above this many rows or columns the clustering reorder falls back to ordering by totals
+max_cluster_size = 2000
+
+
+# Sparse count matrix of how often each value of row_column appears with each value of column_column.
+# Returned as {'matrix': CSR matrix, 'rows': row labels, 'columns': column labels}, labels sorted like
+# pd.crosstab would sort them. Missing values and the excluded row labels are left out.
+def build_cooccurrence(df, row_column='cve', column_column='technique-id', exclude_rows=('UNKNOWN',)):
+    pairs = df[[row_column, column_column]].dropna()
+    pairs = pairs[~pairs[row_column].isin(exclude_rows)]
+    row_codes, rows = pd.factorize(pairs[row_column], sort=True)
+    column_codes, columns = pd.factorize(pairs[column_column], sort=True)
+    matrix = sparse.coo_matrix((np.ones(len(pairs), dtype=np.int32), (row_codes, column_codes)),
+                               shape=(len(rows), len(columns))).tocsr()  # Duplicate pairs are summed
+    return {'matrix': matrix, 'rows': np.asarray(rows, dtype=object), 'columns': np.asarray(columns, dtype=object)}
+
+
+def _take(cooccurrence, row_positions, column_positions):
+    return {'matrix': cooccurrence['matrix'][row_positions][:, column_positions],
+            'rows': cooccurrence['rows'][row_positions], 'columns': cooccurrence['columns'][column_positions]}
+
+
+# Restrict to the selected row and column labels (all of them when a selection is empty), then drop the
+# rows and columns left without any co-occurrence, as a crosstab of the filtered rows would
+def select(cooccurrence, rows=None, columns=None):
+    row_positions = np.flatnonzero(np.isin(cooccurrence['rows'], list(rows))) if rows else slice(None)
+    column_positions = (np.flatnonzero(np.isin(cooccurrence['columns'], list(columns))) if columns
+                        else slice(None))
+    selected = _take(cooccurrence, row_positions, column_positions)
+    matrix = selected['matrix']
+    return _take(selected, np.flatnonzero(matrix.getnnz(axis=1)), np.flatnonzero(matrix.getnnz(axis=0)))
+
+
+# Keep the k rows and columns with the highest totals, in their current order
+def top_k(cooccurrence, k_rows=top_k_rows, k_columns=top_k_columns):
+    matrix = cooccurrence['matrix']
+    row_positions = _largest(np.asarray(matrix.sum(axis=1)).ravel(), k_rows)
+    column_positions = _largest(np.asarray(matrix.sum(axis=0)).ravel(), k_columns)
+    return _take(cooccurrence, row_positions, column_positions)
+
+
+def _largest(totals, k):
+    if len(totals) <= k:
+        return np.arange(len(totals))
+    return np.sort(np.argsort(-totals, kind='stable')[:k])
+
+
+# Reorder rows and columns so that similar ones sit next to each other (average-linkage clustering
+# of the L2-normalized count vectors), which turns scattered cells into visible blocks
+def cluster_order(cooccurrence):
+    matrix = cooccurrence['matrix']
+    return _take(cooccurrence, _leaf_order(matrix), _leaf_order(matrix.T.tocsr()))
+
+
+def _leaf_order(matrix):
+    n = matrix.shape[0]
+    if n < 3:
+        return np.arange(n)
+    if n > max_cluster_size:
+        return np.argsort(-np.asarray(matrix.sum(axis=1)).ravel(), kind='stable')
+    from scipy.cluster.hierarchy import leaves_list, linkage  # Slow to import, only needed once a heatmap is drawn
+    vectors = matrix.toarray().astype(np.float64)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return leaves_list(linkage(vectors, method='average', metric='euclidean'))
+
+
+# Merge runs of adjacent rows / columns into bands (summing their counts) until the matrix fits
+# max_rows x max_columns. Band labels read 'first … last (n)'.
+def downsample(cooccurrence, max_rows, max_columns):
+    row_bins, rows = _bands(cooccurrence['rows'], max_rows)
+    column_bins, columns = _bands(cooccurrence['columns'], max_columns)
+    matrix = cooccurrence['matrix']
+    if row_bins is not None:
+        matrix = row_bins @ matrix
+    if column_bins is not None:
+        matrix = matrix @ column_bins.T
+    return {'matrix': matrix.tocsr(), 'rows': rows, 'columns': columns}
+
+
+def _bands(labels, limit):
+    n = len(labels)
+    if n <= limit:
+        return None, labels
+    size = math.ceil(n / limit)
+    band = np.arange(n) // size
+    bins = sparse.csr_matrix((np.ones(n, dtype=np.int32), (band, np.arange(n))), shape=(band[-1] + 1, n))
+    band_labels = []
+    for start in range(0, n, size):
+        end = min(start + size, n) - 1
+        label = labels[start] if end == start else f"{labels[start]} … {labels[end]} ({end - start + 1})"
+        band_labels.append(label)
+    return bins, np.asarray(band_labels, dtype=object)
+
+
+# Selection, top-k trimming, clustering and downsampling in one go: the matrix a heatmap should draw
+def heatmap_matrix(cooccurrence, rows=None, columns=None, k_rows=top_k_rows, k_columns=top_k_columns,
+                   budget=pixel_budget):
+    trimmed = cluster_order(top_k(select(cooccurrence, rows, columns), k_rows, k_columns))
+    return downsample(trimmed, max(1, budget[0] // min_cell_px), max(1, budget[1] // min_cell_px))
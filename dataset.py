@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import span
+
+# Folder holding the Parquet copies of the workbooks (one file per workbook version)
+CACHE_DIR = '.cache'
+
+# In-memory types of the dataset columns, applied by compact_frame (DATASET_COMPACT=0 keeps the types of
+# the workbook). Identifiers and labels repeat on many rows and are stored as categoricals. Counts and
+# bounded weights are narrowed to the listed type when it holds every value exactly, and widened back to
+# float64 wherever they take part in arithmetic, so every score stays the same. Columns a sheet does not
+# have are skipped.
+compact_datasets = os.environ.get('DATASET_COMPACT', '1') != '0'
+category_columns = ['apt', 'group', 'technique-id', 'subtechnique-name', 'tactic-id', 'tactics', 'cve', 'severity',
+                    'cwe-id', 'region', 'platforms', 'attacker-category']
+narrow_columns = {
+    'platform-count': np.int8, 'tactic-weight': np.int8, 'defence-score': np.int8, 'vulnerability-score': np.int8,
+    'region-count': np.int16, 'days': np.int16, 'cve-year': np.int16, 'impact-score': np.int8,
+    'region-weight': np.float32, 'ioc-weight': np.float32, 'iocperc': np.float32, 'time': np.float32,
+}  # cvss-base-score stays float64: the CVSS figures average it
+
+# Frames already loaded in this process, keyed by (workbook, sheet)
+_datasets = {}
+_lock = threading.Lock()
+# Serialises the manifest updates of this process (file_version is called without _lock)
+_manifest_lock = threading.Lock()
+
+
+# Build a path inside the cache folder, creating the folder on first use
+def cache_path(name):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
+
+# Hash the raw bytes of the workbook so a copied or touched file maps to the same cache entry
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_manifest(manifest_file):
+    try:
+        with open(manifest_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Work out the version of a workbook: the content hash, only recomputed when the mtime changes
+def _source_version(excel, sheet_name):
+    stat = os.stat(excel)
+    manifest_file = cache_path('manifest.json')
+    key = f"{os.path.abspath(excel)}::{sheet_name}"
+    entry = _read_manifest(manifest_file).get(key)
+    if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+        return entry['hash']
+
+    file_hash = _file_hash(excel)
+    with _manifest_lock:
+        # Read again under the lock, so the entries other threads just added are kept
+        manifest = _read_manifest(manifest_file)
+        manifest[key] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': file_hash}
+        tmp_file = f"{manifest_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, manifest_file)  # Atomic so concurrent workers never see half a manifest
+    return file_hash
+
+
+# Version (content hash) of any source file, e.g. a shapefile, recomputed only when its mtime changes
+def file_version(path):
+    return _source_version(path, '')
+
+
+# Name of a cache file for a given workbook version
+def _versioned_path(excel, sheet_name, version, suffix='.parquet'):
+    stem = os.path.splitext(os.path.basename(excel))[0]
+    return cache_path(f"{stem}-{sheet_name}-{version[:16]}{suffix}")
+
+
+# Parse the workbook once with openpyxl and keep a Parquet copy of the sheet
+def _build_parquet(excel, sheet_name, parquet_file):
+    df = pd.read_excel(excel, sheet_name=sheet_name)
+
+    # Standardize column names
+    df.columns = df.columns.str.lower()
+
+    # Mixed-type object columns cannot be written to Parquet, store them as strings
+    for column in df.columns[df.dtypes == object]:
+        if df[column].map(type).nunique() > 1:
+            df[column] = df[column].map(lambda value: value if pd.isna(value) else str(value))
+
+    tmp_file = f"{parquet_file}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_file, index=False)
+    os.replace(tmp_file, parquet_file)
+
+
+# A column in a narrower type of the same kind (integer or float), if it holds every value exactly
+def _narrow(values, dtype):
+    if values.dtype.kind not in 'iuf' or (values.dtype.kind == 'f') != (np.dtype(dtype).kind == 'f'):
+        return values
+    narrowed = values.astype(dtype)  # Out of range integers wrap around, caught below
+    exact = (narrowed.astype(values.dtype) == values) | values.isna()
+    return narrowed if exact.all() else values
+
+
+# The frame with the types of category_columns and narrow_columns, for a smaller in-memory copy.
+# Categories are sorted, so sorting on a column orders rows like sorting on the strings would. Group on
+# these columns with observed=True, and turn them back into objects before filling in strings.
+def compact_frame(df):
+    if not compact_datasets:
+        return df
+    columns = {}
+    for column in category_columns:
+        if column not in df:
+            continue
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            if not categories.is_monotonic_increasing:
+                columns[column] = values.cat.reorder_categories(sorted(categories))
+        elif values.dtype == object:
+            columns[column] = values.astype('category')
+    for column, dtype in narrow_columns.items():
+        if column in df:
+            narrowed = _narrow(df[column], dtype)
+            if narrowed.dtype != df[column].dtype:
+                columns[column] = narrowed
+    return df.assign(**columns) if columns else df
+
+
+# Load a sheet of a workbook, shared by every tab of the dashboard.
+# The frame is parsed from Excel only when the workbook changed; otherwise it is memory-mapped from
+# the Parquet cache and compacted (see compact_frame). The same frame object is returned to every caller,
+# so treat it as read-only and use df.assign / df.copy() instead of assigning columns in place.
+# The workbook is only looked at again with reload=True, which swaps in the new version if it changed.
+def load_dataset(excel='VisualAmended_v9.xlsx', sheet_name='CleanedDataset', reload=False):
+    key = (os.path.abspath(excel), sheet_name)
+    entry = _datasets.get(key)
+    if entry is not None and not reload:
+        return entry['frame']
+
+    with _lock:
+        entry = _datasets.get(key)
+        if entry is None or reload:
+            version = _source_version(excel, sheet_name)
+            if entry is None or entry['version'] != version:
+                name = f"{os.path.basename(excel)}:{sheet_name}"
+                parquet_file = _versioned_path(excel, sheet_name, version)
+                if not os.path.exists(parquet_file):
+                    with span('parse', name):
+                        _build_parquet(excel, sheet_name, parquet_file)
+
+                with span('load', name):
+                    entry = {'version': version, 'frame': _read_parquet(parquet_file)}
+                _datasets[key] = entry
+    return entry['frame']
+
+
+# Read a Parquet copy into the compact types, then hand the read buffers back to the system: Arrow's
+# allocator keeps them otherwise, and they add up to several times the frame in every worker
+def _read_parquet(parquet_file):
+    import pyarrow as pa
+    df = compact_frame(pd.read_parquet(parquet_file, memory_map=True))
+    pa.default_memory_pool().release_unused()
+    return df
+
+
+# Version (content hash) of a loaded workbook, used to key caches built on top of the dataset
+def dataset_version(excel='VisualAmended_v9.xlsx', sheet_name='CleanedDataset'):
+    load_dataset(excel, sheet_name)
+    return _datasets[(os.path.abspath(excel), sheet_name)]['version']
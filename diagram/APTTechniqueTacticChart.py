@@ -8,7 +8,7 @@ def create_techniques_tactics_chart(df, selected_apts=None):
         df = df[df['apt'].isin(selected_apts)]
 
     # Group by 'group' (APT Group) and count distinct techniques and tactics
-    grouped_data = df.groupby('apt').agg(
+    grouped_data = df.groupby('apt', observed=True).agg(
         Distinct_Technique_Count=('technique-id', 'nunique'),
         Distinct_Tactic_Count=('subtechnique-name', 'nunique')  # Assuming subtechnique-name represents tactics
     ).reset_index()
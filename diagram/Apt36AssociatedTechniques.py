@@ -1,9 +1,15 @@
 import networkx as nx
 import plotly.graph_objects as go
+from graph_layout import compute_layout
+from graph_index import build_graph_index, techniques_of, apts_using
 
-def create_apt_network_techniques(df, selected_apts):
+# 'index' is the graph index of df (see graph_index.py); it is built from df when not given
+def create_apt_network_techniques(df, selected_apts, index=None):
     G = nx.Graph()
 
+    if index is None:
+        index = build_graph_index(df)
+
     # If no APTs are selected, default to adding APT-C-36
     if selected_apts is None or len(selected_apts) == 0:
         selected_apts = ['APT-C-36']  # Default to APT-C-36 if none selected
@@ -17,7 +23,7 @@ def create_apt_network_techniques(df, selected_apts):
         G.add_node(apt, color='red')  # Selected APT in red
 
         # Identify techniques used by the selected APT
-        selected_apt_techniques = df.loc[df['apt'] == apt, 'technique-id'].unique()
+        selected_apt_techniques = techniques_of(index, apt)
 
         # Add techniques associated with the selected APT
         for technique in selected_apt_techniques:
@@ -25,15 +31,15 @@ def create_apt_network_techniques(df, selected_apts):
             G.add_edge(apt, technique)  # Connect APT to its technique
 
             # Find related APTs using the same technique
-            related_apts = df.loc[df['technique-id'] == technique, 'apt'].unique()
+            related_apts = apts_using(index, [technique])
 
             # Add related APTs to the graph
             for related_apt in related_apts:
                 G.add_node(related_apt, color='skyblue')  # Related APTs in skyblue
                 G.add_edge(technique, related_apt)  # Connect technique to related APT
 
-    # Get node positions using spring layout
-    pos = nx.spring_layout(G)
+    # Get node positions (cached force-directed layout, warm-started from earlier figures)
+    pos = compute_layout(G, index['version'])
 
     # Extract edge coordinates for Plotly
     edge_x = []
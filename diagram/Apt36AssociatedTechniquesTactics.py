@@ -1,16 +1,22 @@
 import networkx as nx
 import plotly.graph_objects as go
+from graph_layout import compute_layout
+from graph_index import build_graph_index, techniques_of, apts_using, tactics_of
 
 
-def create_apt_network_techniques_tactics(df, selected_apts):
+# 'index' is the graph index of df (see graph_index.py); it is built from df when not given
+def create_apt_network_techniques_tactics(df, selected_apts, index=None):
     G = nx.Graph()
 
+    if index is None:
+        index = build_graph_index(df)
+
     # If no APTs are selected, default to adding APT-C-36
     if selected_apts is None or len(selected_apts) == 0:
         G.add_node('APT-C-36', color='red')  # APT-C-36 in red
         # You may want to find related techniques and tactics for APT-C-36 here as well
-        apt_c36_techniques = df.loc[df['apt'] == 'APT-C-36', 'technique-id'].unique()
-        related_apts = df[df['technique-id'].isin(apt_c36_techniques)]['apt'].unique()
+        apt_c36_techniques = techniques_of(index, 'APT-C-36')
+        related_apts = apts_using(index, apt_c36_techniques)
 
         # Limit to a maximum of 5 related APTs
         limited_related_apts = related_apts[:5]
@@ -21,7 +27,7 @@ def create_apt_network_techniques_tactics(df, selected_apts):
             G.add_edge('APT-C-36', apt)
 
             # Get associated techniques for the related APT
-            techniques = df.loc[df['apt'] == apt, 'technique-id'].unique()
+            techniques = techniques_of(index, apt)
 
             # Limit the techniques to 5
             limited_techniques = techniques[:5]
@@ -31,7 +37,7 @@ def create_apt_network_techniques_tactics(df, selected_apts):
                 G.add_edge(apt, technique)  # Connect related APTs to their techniques
 
                 # Get tactics associated with the technique
-                tactics = df.loc[df['technique-id'] == technique, 'tactics'].dropna().unique()  # Get unique tactics
+                tactics = tactics_of(index, technique)  # Get unique tactics
 
                 for tactic in tactics:
                     if tactic:  # Check if the tactic is not empty
@@ -72,15 +78,15 @@ def create_apt_network_techniques_tactics(df, selected_apts):
                     G.add_edge(related_apt, technique)  # Connect related APTs to their techniques
 
                     # Get tactics associated with the technique
-                    tactics = df.loc[df['technique-id'] == technique, 'tactics'].dropna().unique()  # Get unique tactics
+                    tactics = tactics_of(index, technique)  # Get unique tactics
 
                     for tactic in tactics:
                         if tactic:  # Check if the tactic is not empty
                             G.add_node(tactic, color='orange')  # Tactics in orange
                             G.add_edge(technique, tactic)  # Connect technique to its tactic
 
-    # Get node positions using spring layout
-    pos = nx.spring_layout(G)
+    # Get node positions (cached force-directed layout, warm-started from earlier figures)
+    pos = compute_layout(G, index['version'])
 
     # Extract edge coordinates for Plotly
     edge_x = []
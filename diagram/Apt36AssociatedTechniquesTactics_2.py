@@ -1,10 +1,16 @@
 import networkx as nx
 import plotly.graph_objects as go
+from graph_layout import compute_layout
+from graph_index import build_graph_index, techniques_of, tactics_of, cves_of
 
 
-def create_apt_network_techniques_tactics_cve(df, selected_apts):
+# 'index' is the graph index of df (see graph_index.py); it is built from df when not given
+def create_apt_network_techniques_tactics_cve(df, selected_apts, index=None):
     G = nx.Graph()
 
+    if index is None:
+        index = build_graph_index(df)
+
     # If no APTs are selected, default to adding APT-C-36
     if selected_apts is None or len(selected_apts) == 0:
         selected_apts = ['APT-C-36']  # Default to APT-C-36 if none selected
@@ -18,31 +24,29 @@ def create_apt_network_techniques_tactics_cve(df, selected_apts):
         G.add_node(apt, color='red')  # Selected APT in red
 
         # Identify techniques used by the selected APT
-        selected_apt_techniques = df.loc[df['apt'] == apt, 'technique-id'].unique()
+        selected_apt_techniques = techniques_of(index, apt)
 
         # Add techniques associated with the selected APT
         for technique in selected_apt_techniques:
             G.add_node(technique, color='lightgreen')  # Techniques in lightgreen
             G.add_edge(apt, technique)  # Connect APT to its technique
 
-            # Get tactics associated with the technique
-            tactics = df.loc[df['technique-id'] == technique, 'tactics'].dropna().unique()  # Get unique tactics
+            # Get tactics and CVEs associated with the technique (the CVEs are the same for each of its tactics)
+            tactics = tactics_of(index, technique)  # Get unique tactics
+            cves = cves_of(index, technique)  # Get unique CVEs
 
             for tactic in tactics:
                 if tactic:  # Check if the tactic is not empty
                     G.add_node(tactic, color='orange')  # Tactics in orange
                     G.add_edge(technique, tactic)  # Connect technique to its tactic
 
-                    # Get CVEs associated with the technique
-                    cves = df.loc[df['technique-id'] == technique, 'cve'].dropna().unique()  # Get unique CVEs
-
                     for cve in cves:
                         if cve:  # Check if the CVE is not empty
                             G.add_node(cve, color='purple')  # CVEs in purple
                             G.add_edge(tactic, cve)  # Connect tactic to its CVE
 
-    # Get node positions using spring layout
-    pos = nx.spring_layout(G)
+    # Get node positions (cached force-directed layout, warm-started from earlier figures)
+    pos = compute_layout(G, index['version'])
 
     # Extract edge coordinates for Plotly
     edge_x = []
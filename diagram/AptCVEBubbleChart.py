@@ -11,7 +11,7 @@ def create_bubble_chart_apt_cvss(df, selected_apts=None):
         df_bubble = df_bubble[df_bubble['apt'].isin(selected_apts)]
 
     # Create a count for the number of CVEs per APT group and average CVSS for bubble size
-    df_bubble_chart = df_bubble.groupby('apt').agg(
+    df_bubble_chart = df_bubble.groupby('apt', observed=True).agg(
         CVE_Count=('cvss-base-score', 'count'),
         Avg_CVSS=('cvss-base-score', 'mean')
     ).reset_index()
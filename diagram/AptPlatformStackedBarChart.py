@@ -1,25 +1,20 @@
 import plotly.express as px
 import pandas as pd
 
-# Function to create the stacked bar chart with filtering
-def create_apt_platform_stacked_bar_chart(df, selected_apts=None, selected_platforms=None):
-    # Ensure 'platforms' column exists and is not NaN
-    df = df.copy()  # Make an explicit copy of the DataFrame to avoid modifying the original one
-    df['platforms'] = df['platforms'].fillna('')
-
-    # Split platforms by commas and explode into separate rows
-    df['platforms'] = df['platforms'].str.split(',')
-    df_expanded = df.explode('platforms')
+from platform_table import build_platform_table, expand_platforms, top_platforms
 
-    # Strip leading/trailing spaces from 'platforms' column using .loc to avoid SettingWithCopyWarning
-    df_expanded.loc[:, 'platforms'] = df_expanded['platforms'].str.strip()
+# Function to create the stacked bar chart with filtering
+def create_apt_platform_stacked_bar_chart(df, selected_apts=None, selected_platforms=None, platforms=None):
+    # One row per (row, platform) pair, from the shared platform table when given
+    if platforms is None:
+        platforms = build_platform_table(df)
+    df_expanded = expand_platforms(df, platforms, ['apt'])
 
     # Identify the top 10 platforms by frequency
-    platform_counts = df_expanded['platforms'].value_counts()
-    top_10_platforms = platform_counts.head(10).index.tolist()
+    top_10_platforms = top_platforms(df_expanded, 10)
 
     # Filter the data to include only the top 10 platforms
-    df_top_platforms = df_expanded.loc[df_expanded['platforms'].isin(top_10_platforms)]
+    df_top_platforms = df_expanded.loc[df_expanded['platform'].isin(top_10_platforms)]
 
     # Apply filtering for selected APTs, if provided
     if selected_apts:
@@ -27,10 +22,12 @@ def create_apt_platform_stacked_bar_chart(df, selected_apts=None, selected_platf
 
     # Apply filtering for selected platforms, if provided
     if selected_platforms:
-        df_top_platforms = df_top_platforms.loc[df_top_platforms['platforms'].isin(selected_platforms)]
+        df_top_platforms = df_top_platforms.loc[df_top_platforms['platform'].isin(selected_platforms)]
 
     # Group the data by APT and platform
-    apt_platform_counts = df_top_platforms.groupby(['apt', 'platforms']).size().reset_index(name='count')
+    apt_platform_counts = (df_top_platforms.groupby(['apt', 'platform'], observed=True).size()
+                           .reset_index(name='count'))
+    apt_platform_counts['platforms'] = apt_platform_counts.pop('platform').astype(str)
 
     # Generate the stacked bar chart
     fig = px.bar(
@@ -1,22 +1,23 @@
 import pandas as pd
-import geopandas as gpd
 import folium
 from branca.colormap import linear
 
-def create_region_map(df, shapefile_path='ne_10m_admin_0_countries/ne_10m_admin_0_countries.shp'):
+from geometry import default_level, shapefile_path as default_shapefile_path, simplified_world
+
+def create_region_map(df, shapefile_path=default_shapefile_path, level=default_level):
     # Group data by region (country) to get the frequency of regions or apartments
-    region_frequency = df.groupby('region').size().reset_index(name='region_count')
+    region_frequency = df.groupby('region', observed=True).size().reset_index(name='region_count')
+
+    return create_region_count_map(region_frequency, shapefile_path, level)
 
-    # Load country boundaries as GeoDataFrame from the specified shapefile
-    world = gpd.read_file(shapefile_path)
 
-    # Check if the CRS is set
-    if world.crs is None:
-        world = world.set_crs(epsg=4326)  # WGS 84 coordinate reference system
+# Map of an already computed 'region' / 'region_count' frame
+def create_region_count_map(region_frequency, shapefile_path=default_shapefile_path, level=default_level):
+    # Country boundaries, simplified and cached once per shapefile ('NAME_EN' holds the English name)
+    world = simplified_world(level, shapefile_path)
 
-    # Convert the 'NAME' in English and 'region' columns to string before merging
-    world['NAME_EN'] = world['NAME'].astype(str)
-    region_frequency['region'] = region_frequency['region'].astype(str)
+    # Convert the 'region' column to string before merging
+    region_frequency = region_frequency.assign(region=region_frequency['region'].astype(str))
 
     # Merge world boundaries with the region frequency data
     world_with_data = world.merge(region_frequency, left_on='NAME_EN', right_on='region', how='left')
@@ -45,24 +46,13 @@ def create_region_map(df, shapefile_path='ne_10m_admin_0_countries/ne_10m_admin_
                 'fillOpacity': 0.7,
             }
 
-    # Create a GeoJson layer with styling
+    # Create a GeoJson layer with styling (its black outlines also draw the country boundaries)
     folium.GeoJson(
         world_with_data,
         style_function=style_function,
         tooltip=folium.GeoJsonTooltip(fields=['NAME_EN', 'region_count'])  # Tooltip to show country name and count
     ).add_to(m)
 
-    # Add country boundaries to the map (for visual clarity)
-    folium.GeoJson(
-        world,
-        style_function=lambda feature: {
-            'fillColor': 'transparent',  # Make the fill color transparent
-            'color': 'black',  # Border color
-            'weight': 1.0,  # Border weight
-            'fillOpacity': 0  # No fill opacity
-        },
-    ).add_to(m)
-
     # Add a color legend to the map
     colormap.caption = 'APT Density'
     colormap.add_to(m)
@@ -1,6 +1,4 @@
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import plotly.express as px
 
 # Function to create the bar chart for CVE and CWE
@@ -10,7 +8,7 @@ def create_cve_cwe_bar_chart(df):
     df_filtered = df_filtered[(df_filtered['cwe-id'] != 'UNKNOWN') & (df_filtered['cwe-id'] != 'NVD-CWE-noinfo')]
 
     # Group the data by CWE and count the number of CVEs associated with each CWE
-    cwe_cve_count = df_filtered.groupby('cwe-id').count().reset_index()
+    cwe_cve_count = df_filtered.groupby('cwe-id', observed=True).count().reset_index()
     cwe_cve_count.columns = ['cwe-id', 'CVE Count']
 
     # Create the bar chart using Plotly Express
@@ -1,29 +1,24 @@
 import plotly.graph_objects as go
-import pandas as pd
 
-# Function to create an interactive heatmap for CVE and Technique relationships
-def create_cve_technique_heatmap(df,selected_technique=None):
-    # Extract relevant columns for the heatmap (CVE ID and Technique)
-    df_heatmap = df[['cve', 'technique-id']].dropna()
-
-    # Remove rows where 'cve' or 'technique-id' contains 'UNKNOWN'
-    df_heatmap = df_heatmap[df_heatmap['cve'] != 'UNKNOWN']
-
-    # Apply technique filtering if 'selected_technique' is provided
-    if selected_technique:
-        df_heatmap = df_heatmap[df_heatmap['technique-id'].isin(selected_technique)]
-
-    # Create a crosstab (matrix) to show the number of times each CVE is associated with each Technique
-    cve_technique_matrix = pd.crosstab(df_heatmap['cve'], df_heatmap['technique-id'])
+from cooccurrence import build_cooccurrence, heatmap_matrix
 
+# Function to create an interactive heatmap for CVE and Technique relationships
+def create_cve_technique_heatmap(df, selected_technique=None, cooccurrence=None, selected_cves=None):
+    # Sparse matrix of the number of times each CVE is associated with each Technique
+    # ('UNKNOWN' CVEs are left out), from the shared matrix when given
+    if cooccurrence is None:
+        cooccurrence = build_cooccurrence(df, 'cve', 'technique-id')
 
+    # Apply CVE and technique filtering, keep the busiest CVEs and techniques, group similar ones
+    # together and merge neighbours into bands so the figure stays within its pixel budget
+    cve_technique_matrix = heatmap_matrix(cooccurrence, selected_cves, selected_technique)
 
     # Create the interactive heatmap with Plotly
     heatmap_fig = go.Figure(
         data=go.Heatmap(
-            z=cve_technique_matrix.values,
-            x=cve_technique_matrix.columns,
-            y=cve_technique_matrix.index,
+            z=cve_technique_matrix['matrix'].toarray(),
+            x=cve_technique_matrix['columns'],
+            y=cve_technique_matrix['rows'],
             colorscale='Blues'
         )
     )
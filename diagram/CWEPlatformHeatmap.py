@@ -1,12 +1,13 @@
 import plotly.graph_objects as go
 import pandas as pd
 
-def create_cwe_platform_heatmap(df, selected_cwes=None, selected_platforms=None):
-    # Split platforms into separate rows
-    df_expanded = df.assign(platform=df['platforms'].str.split(',')).explode('platform')
+from platform_table import build_platform_table, expand_platforms
 
-    # Remove any leading/trailing whitespace from platform names
-    df_expanded['platform'] = df_expanded['platform'].str.strip()
+def create_cwe_platform_heatmap(df, selected_cwes=None, selected_platforms=None, platforms=None):
+    # One row per (row, platform) pair of the selected platforms, from the shared platform table when given
+    if platforms is None:
+        platforms = build_platform_table(df)
+    df_expanded = expand_platforms(df, platforms, ['cwe-id'], selected_platforms)
 
     # Filter out rows with 'UNKNOWN' in the 'CWE-ID' column
     df_expanded = df_expanded[df_expanded['cwe-id'] != 'UNKNOWN']
@@ -15,12 +16,10 @@ def create_cwe_platform_heatmap(df, selected_cwes=None, selected_platforms=None)
     if selected_cwes:
         df_expanded = df_expanded[df_expanded['cwe-id'].isin(selected_cwes)]
 
-    # Apply platform filtering if selected
-    if selected_platforms:
-        df_expanded = df_expanded[df_expanded['platform'].isin(selected_platforms)]
-
     # Create a pivot table to count occurrences of each CWE per platform
-    platform_cwe_pivot = df_expanded.pivot_table(index='platform', columns='cwe-id', aggfunc='size', fill_value=0)
+    platform_cwe_pivot = df_expanded.pivot_table(index='platform', columns='cwe-id', aggfunc='size', fill_value=0,
+                                                 observed=True)
+    platform_cwe_pivot.index = platform_cwe_pivot.index.astype(str)
 
     # Create the heatmap
     heatmap = go.Figure(go.Heatmap(
@@ -1,31 +1,28 @@
 import pandas as pd
 import plotly.express as px
 
-# Function to create the stacked bar chart
-def create_platform_ioc_stacked_bar_chart(df, selected_platforms=None):
-    # Ensure 'platforms' column exists and is not NaN
-    df['platforms'] = df['platforms'].fillna('')
-
-    # Split platforms by commas and explode into separate rows
-    df_expanded = df.assign(platforms=df['platforms'].str.split(',')).explode('platforms')
-    df_expanded['platforms'] = df_expanded['platforms'].str.strip()
+from platform_table import build_platform_table, expand_platforms, top_platforms
 
-    # Apply APT filtering if selected
-    if selected_platforms:
-        df_expanded = df_expanded[df_expanded['platforms'].isin(selected_platforms)]
+# Function to create the stacked bar chart
+def create_platform_ioc_stacked_bar_chart(df, selected_platforms=None, platforms=None):
+    # One row per (row, platform) pair of the selected platforms, from the shared platform table when given
+    if platforms is None:
+        platforms = build_platform_table(df)
+    df_expanded = expand_platforms(df, platforms, ['ioc-weight'], selected_platforms)
 
     # Filter out rows where 'ioc-weight' is 0.0
     df_expanded = df_expanded[df_expanded['ioc-weight'] != 0.0]
 
     # Identify the top 10 platforms by frequency
-    platform_counts = df_expanded['platforms'].value_counts()
-    top_10_platforms = platform_counts.head(10).index.tolist()
+    top_10_platforms = top_platforms(df_expanded, 10)
 
     # Filter the data to include only the top 10 platforms
-    df_top_platforms = df_expanded[df_expanded['platforms'].isin(top_10_platforms)]
+    df_top_platforms = df_expanded[df_expanded['platform'].isin(top_10_platforms)]
 
     # Create a pivot table with platforms as index and IOC weights as columns
-    stacked_data = df_top_platforms.pivot_table(index='platforms', columns='ioc-weight', aggfunc='size', fill_value=0)
+    stacked_data = df_top_platforms.pivot_table(index='platform', columns='ioc-weight', aggfunc='size', fill_value=0,
+                                                observed=True)
+    stacked_data.index = stacked_data.index.astype(str).rename('platforms')
 
     # Reset the pivot table to create x and y data for Plotly
     stacked_data = stacked_data.reset_index()
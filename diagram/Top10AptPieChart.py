@@ -5,7 +5,7 @@ import plotly.graph_objects as go
 # Function to create the pie chart for top 10 APT Groups by Number of Techniques
 def create_pie_chart(data):
     # Group data by APT group and count techniques
-    apt_technique_counts = data.groupby('apt')['technique-id'].nunique().reset_index()
+    apt_technique_counts = data.groupby('apt', observed=True)['technique-id'].nunique().reset_index()
 
     # Rename the columns for clarity
     apt_technique_counts.columns = ['apt', 'Technique Count']
@@ -13,6 +13,11 @@ def create_pie_chart(data):
     # Sort and get the top 10 APT groups based on technique count
     top_10_apts = apt_technique_counts.nlargest(10, 'Technique Count')
 
+    return create_top_apt_pie_chart(top_10_apts)
+
+
+# Pie chart of an already computed 'apt' / 'Technique Count' frame
+def create_top_apt_pie_chart(top_10_apts):
     # Create the pie chart
     fig = go.Figure(data=[go.Pie(
         labels=top_10_apts['apt'],
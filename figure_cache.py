@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from dataset import CACHE_DIR
+from instrumentation import span
+
+# Byte budgets of the in-process LRU and of the on-disk store shared by all gunicorn workers.
+# Point FIGURE_CACHE_DIR at a tmpfs such as /dev/shm/figures to keep the shared store in memory.
+memory_budget = int(os.environ.get('FIGURE_CACHE_BYTES', 64 * 1024 * 1024))
+disk_budget = int(os.environ.get('FIGURE_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+figure_dir = os.environ.get('FIGURE_CACHE_DIR', os.path.join(CACHE_DIR, 'figures'))
+# Part of every figure key, with the dashboard's source and the plotly version: bump it when figures
+# change for a reason neither shows (e.g. another release of a library the builders use)
+FIGURE_CACHE_VERSION = 1
+# Directories of the repository whose modules never build a figure
+_unrelated_dirs = {'benchmark', 'depracated', '__pycache__'}
+
+
+# LRU cache of serialized figure JSON with a byte budget, backed by a directory shared between processes
+class FigureCache:
+    def __init__(self, max_bytes, directory=None, max_disk_bytes=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = None  # Measured lazily the first time something is written
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            figure_json = self._entries.get(key)
+            if figure_json is not None:
+                self._entries.move_to_end(key)
+                return figure_json
+
+        # Fall back to the shared store, a figure another worker already rendered
+        if self.directory:
+            try:
+                with open(self._file(key), encoding='utf-8') as f:
+                    figure_json = f.read()
+            except OSError:
+                return None
+            self._remember(key, figure_json)
+        return figure_json
+
+    def put(self, key, figure_json):
+        self._remember(key, figure_json)
+        if self.directory:
+            self._write(key, figure_json)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remember(self, key, figure_json):
+        size = len(figure_json)
+        if size > self.max_bytes:
+            return  # Never let one figure flush the whole cache
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = figure_json
+            self._bytes += size
+
+            # Evict the least recently used figures until we are back under budget
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def _file(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.json')
+
+    def _write(self, key, figure_json):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._file(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(figure_json)
+        os.replace(tmp_path, path)  # Readers in other workers never see a partial file
+
+        if self.max_disk_bytes is None:
+            return
+        if self._disk_bytes is None:
+            self._disk_bytes = self._disk_usage()[0]
+        else:
+            self._disk_bytes += len(figure_json)
+        if self._disk_bytes > self.max_disk_bytes:
+            self._prune_disk()
+
+    def _disk_usage(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return sum(size for _, size, _ in files), files
+
+    # Delete the oldest files (other workers may have written too) down to 80% of the disk budget
+    def _prune_disk(self):
+        total, files = self._disk_usage()
+        for _, size, path in sorted(files):
+            if total <= 0.8 * self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._disk_bytes = total
+
+
+figure_cache = FigureCache(memory_budget, figure_dir, disk_budget)
+
+
+# Turn a dropdown value (None, a single value or a list) into a hashable, order-independent tuple
+def normalize_filter(value):
+    if value is None:
+        return ()
+    if isinstance(value, (str, int, float)):
+        return (value,)
+    return tuple(sorted(set(value), key=str))
+
+
+def _name(builder):
+    return f"{builder.__module__}.{builder.__name__}"
+
+
+_code_version = None
+
+
+# Version of the code behind the figures: FIGURE_CACHE_VERSION, the plotly version and a hash of every
+# module of the dashboard (the builders, the helpers they use like cooccurrence.py or graph_layout.py, and
+# the arguments visualisation.py passes them), so figures cached by older code are never served, neither
+# from the shared store after a deploy nor from a worker not restarted yet. Computed once per process.
+def code_version():
+    global _code_version
+    if _code_version is None:
+        import plotly
+        digest = hashlib.sha1(f"{FIGURE_CACHE_VERSION}\0{plotly.__version__}".encode('utf-8'))
+        root = os.path.dirname(os.path.abspath(__file__))
+        for directory, subdirectories, files in os.walk(root):
+            subdirectories[:] = sorted(name for name in subdirectories
+                                       if name not in _unrelated_dirs and not name.startswith('.'))
+            for name in sorted(files):
+                if name.endswith('.py'):
+                    path = os.path.join(directory, name)
+                    digest.update(os.path.relpath(path, root).encode('utf-8') + b'\0')
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+# Key of a figure in the cache: (builder, code version, normalized filters, dataset version)
+def figure_key(builder, filters, version):
+    return _name(builder), code_version(), tuple(normalize_filter(f) for f in filters), version
+
+
+# Build a figure and serialize it to JSON, without looking at the cache
+def render_json(builder, *args, **kwargs):
+    name = _name(builder)
+    with span('build', name):
+        figure = builder(*args, **kwargs)
+    with span('serialize', name):
+        return figure.to_json()
+
+
+def load_figure(builder, figure_json):
+    with span('deserialize', _name(builder)):
+        return json.loads(figure_json)
+
+
+# Return the figure built by builder(*args), cached on (builder, code version, normalized filters,
+# dataset version). 'filters' must hold every dropdown value the figure depends on, and nothing else,
+# so that moving an unrelated filter is still a cache hit. The figure is returned as a plain dict.
+def cached_figure(builder, filters, version, *args, **kwargs):
+    key = figure_key(builder, filters, version)
+    figure_json = figure_cache.get(key)
+    if figure_json is None:
+        figure_json = render_json(builder, *args, **kwargs)
+        figure_cache.put(key, figure_json)
+    return load_figure(builder, figure_json)
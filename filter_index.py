@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+# A value whose rows are at least 1/dense_ratio of the frame also keeps a packed bitmap (n / 8 bytes):
+# below that its sorted uint32 row positions take less room than the bitmap, above it more
+dense_ratio = 32
+
+
+# Inverted index of the filter columns of a frame, {dimension name: column}: for each dimension, the row
+# positions of every value, grouped by value ('positions' sorted by value code, value k's rows in
+# positions[offsets[k]:offsets[k + 1]], in row order), plus a packed row bitmap for each frequent value.
+# Missing values are indexed under None (isin matches them with None or NaN).
+# bridges adds multi-valued dimensions, {dimension name: bridge table}, where the table has one row per
+# (row, value) pair: 'row' the index label of the frame's row and the value in a categorical column named
+# after the dimension (like platform_table.build_platform_table); a row matches if any of its values does.
+def build_filter_index(df, dimensions, bridges=None):
+    n = len(df)
+    index = {'rows': n, 'dimensions': {}}
+    for name, column in dimensions.items():
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, labels = pd.factorize(values)
+        dimension = index['dimensions'][name] = _dimension(np.arange(n), codes, labels, n)
+        dimension['row_codes'] = np.where(codes < 0, len(labels), codes).astype(np.int32)  # Value of each row
+    for name, table in (bridges or {}).items():
+        rows, values = df.index.get_indexer(table['row']), table[name]
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+        dimension = index['dimensions'][name] = _dimension(rows, codes, labels, n)
+        # Values of each row: pair_codes[row_offsets[row]:row_offsets[row + 1]]
+        by_row = np.argsort(rows, kind='stable')
+        dimension['pair_codes'] = np.where(codes < 0, len(labels), codes)[by_row].astype(np.int32)
+        dimension['row_offsets'] = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+    return index
+
+
+# One dimension from (row position, value code) pairs; code -1 is a missing value
+def _dimension(rows, codes, labels, n):
+    codes = np.where(codes < 0, len(labels), codes)
+    counts = np.bincount(codes, minlength=len(labels) + 1)
+    positions = rows[np.argsort(codes, kind='stable')].astype(np.uint32)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    bitmaps = {}
+    for code in np.flatnonzero(counts * dense_ratio >= n):
+        selected = np.zeros(n, dtype=bool)
+        selected[positions[offsets[code]:offsets[code + 1]]] = True
+        bitmaps[code] = np.packbits(selected)
+    lookup = {label: code for code, label in enumerate(labels)}
+    if counts[-1]:
+        lookup[None] = len(labels)
+    return {'labels': labels, 'codes': lookup, 'counts': counts, 'positions': positions, 'offsets': offsets,
+            'bitmaps': bitmaps}
+
+
+# Row positions matching every selection, {dimension name: selected values}: the rows of the selected
+# values are OR'ed within a dimension and AND'ed across dimensions, most selective dimension first.
+# Empty selections are ignored; None when nothing is selected at all.
+def select_positions(index, selections):
+    n = index['rows']
+    selections = {name: values for name, values in selections.items() if values}
+    if not selections:
+        return None
+    if len(selections) == 1:  # Nothing to intersect: the positions of the values are the answer
+        (name, values), = selections.items()
+        return _union(index['dimensions'][name], values, n, dense=False)
+    sets = [_union(index['dimensions'][name], values, n) for name, values in selections.items()]
+    sets.sort(key=lambda rows: len(rows) if rows.dtype == np.uint32 else n)
+    result = sets[0]
+    for rows in sets[1:]:
+        if result.dtype != np.uint32:  # Two bitmaps
+            result = result & rows
+        elif rows.dtype == np.uint32:  # Two position lists
+            result = np.intersect1d(result, rows, assume_unique=True)
+        else:
+            result = result[_test_bits(rows, result)]
+        if len(result) == 0:
+            break
+    if result.dtype != np.uint32:
+        result = np.flatnonzero(np.unpackbits(result, count=n))
+    return result
+
+
+# The rows of df (the frame the index was built from) matching the selections, in their order,
+# with their index labels (what chained isin filters would give); df itself when nothing is selected
+def filter_rows(index, df, selections):
+    positions = select_positions(index, selections)
+    return df if positions is None else df.take(positions)
+
+
+# For every dimension, the number of rows each of its values would match if it were selected on top of
+# the selections of the other dimensions: {dimension name: counts}, counts[code] for the code of a value
+# (see value_codes), for the dimensions named in names (all of them by default). Dimensions sharing the
+# same other selections (all those without one) share one row set.
+def facet_counts(index, selections, names=None):
+    selections = {name: values for name, values in selections.items() if values}
+    row_sets = {}
+    facets = {}
+    for name in names or index['dimensions']:
+        dimension = index['dimensions'][name]
+        others = frozenset(selections) - {name}
+        if others not in row_sets:
+            row_sets[others] = select_positions(index, {other: selections[other] for other in others})
+        facets[name] = _counts(dimension, row_sets[others])
+    return facets
+
+
+# Codes of some values of a dimension, all of them indexed (e.g. the dropdown options of the frame)
+def value_codes(index, name, values):
+    return np.array([_code(index['dimensions'][name])(value) for value in values], dtype=np.int64)
+
+
+# Matching rows of each value of a dimension among some row positions (all rows when None)
+def _counts(dimension, positions):
+    if positions is None:
+        return dimension['counts']
+    if 'row_codes' in dimension:
+        return np.bincount(dimension['row_codes'][positions], minlength=len(dimension['counts']))
+    # Gather the pairs of the rows, row after row
+    starts = dimension['row_offsets'][positions]
+    lengths = dimension['row_offsets'][positions + 1] - starts
+    pairs = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+    return np.bincount(dimension['pair_codes'][pairs], minlength=len(dimension['counts']))
+
+
+# The rows of some values of a dimension: sorted positions when they are few (or dense=False),
+# else a packed bitmap
+def _union(dimension, values, n, dense=True):
+    codes = [code for code in dict.fromkeys(map(_code(dimension), values)) if code is not None]
+    positions, offsets = dimension['positions'], dimension['offsets']
+    if len(codes) == 1 and not dense:
+        return positions[offsets[codes[0]]:offsets[codes[0] + 1]]
+    if not dense or sum(offsets[code + 1] - offsets[code] for code in codes) * dense_ratio < n:
+        # A row has a single value, except in bridged dimensions, where it can be listed under several
+        rows = np.concatenate([positions[offsets[code]:offsets[code + 1]] for code in codes]
+                              or [np.empty(0, dtype=np.uint32)])
+        return np.sort(rows) if 'row_codes' in dimension else np.unique(rows)
+    bitmap = np.zeros((n + 7) // 8, dtype=np.uint8)
+    for code in codes:
+        if code in dimension['bitmaps']:
+            bitmap |= dimension['bitmaps'][code]
+        else:
+            rows = positions[offsets[code]:offsets[code + 1]]
+            np.bitwise_or.at(bitmap, rows >> 3, (0x80 >> (rows & 7)).astype(np.uint8))
+    return bitmap
+
+
+# Code of a selected value in a dimension, missing values (None or NaN) included; None if not indexed
+def _code(dimension):
+    codes = dimension['codes']
+    return lambda value: codes.get(None if value is None or value != value else value)
+
+
+# Which of the positions are set in a packed bitmap
+def _test_bits(bitmap, positions):
+    return (bitmap[positions >> 3] >> (7 - (positions & 7)).astype(np.uint8)) & 1 == 1
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+
+# Attacker category of each APT, taken from its first row in the dataset
+def first_attacker_category(df):
+    return df.drop_duplicates('apt').set_index('apt')['attacker-category']
+
+
+# Forecast the probability of attack for every threat actor over a range of years.
+# Years before base_year keep the observed Complexity x Prevalence; from base_year onwards both are grown
+# by the attack factor, weighted by the mean vulnerability score and divided by the defense curve.
+# The year x actor grid is computed with NumPy broadcasting, one row per (year, actor) like the original loop.
+def forecast_threat_scores(df_avg_scores, attacker_categories, vulnerability_score,
+                           attack_growth=0.05, initial_defense_score=1, defense_factor=0.5,
+                           first_year=2019, last_year=2050, base_year=2024):
+    actors = df_avg_scores['apt'].to_numpy()
+    complexity = df_avg_scores['Complexity'].to_numpy(dtype=float)
+    prevalence = df_avg_scores['Prevalence'].to_numpy(dtype=float)
+
+    past_years = np.arange(first_year, min(base_year, last_year + 1))
+    future_years = np.arange(max(first_year, base_year), last_year + 1)
+
+    # For the past years, adjust only Prevalence (already incorporates the time factor)
+    past = np.broadcast_to(complexity * prevalence, (len(past_years), len(actors)))
+
+    # For base_year onwards, apply the growth factor and the changing defense score
+    attack_factor = (1 + attack_growth * (future_years - base_year))[:, None]
+    defense_scores = (initial_defense_score + defense_factor * (future_years - base_year))[:, None]
+    future = (complexity * attack_factor) * (prevalence * attack_factor) * vulnerability_score / defense_scores
+
+    years = np.concatenate([past_years, future_years])
+    df_results = pd.DataFrame({
+        'Year': np.repeat(years, len(actors)),
+        'Threat Actor': np.tile(actors, len(years)),
+        'Complexity': np.tile(complexity, len(years)),
+        'Prevalence': np.tile(prevalence, len(years)),
+        'Probability': np.concatenate([past, future]).ravel(),
+        'Attacker Category': np.tile(attacker_categories.reindex(actors).to_numpy(), len(years)),
+    })
+
+    # Calculate Probability_Percentage based on the newly calculated Probability
+    min_probability = df_results['Probability'].min()
+    max_probability = df_results['Probability'].max()
+    df_results['Probability_Percentage'] = ((df_results['Probability'] - min_probability) /
+                                            (max_probability - min_probability)) * 100
+    return df_results
@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+
+from dataset import CACHE_DIR, file_version
+from instrumentation import span
+
+shapefile_path = 'ne_10m_admin_0_countries/ne_10m_admin_0_countries.shp'
+# Simplification tolerances (degrees) of the country outlines drawn on the maps.
+# The full-resolution Natural Earth outlines are far more detailed than a world map at zoom 1-4 can show.
+simplify_tolerances = {'low': 0.5, 'medium': 0.1, 'high': 0.02}
+default_level = os.environ.get('REGION_MAP_LEVEL', 'medium')
+geometry_dir = os.path.join(CACHE_DIR, 'geometry')
+
+_worlds = {}  # (shapefile, version, level) -> GeoDataFrame, level None being the full resolution
+_countries = {}  # (shapefile, version) -> sorted country names
+_lock = threading.Lock()
+
+
+def geometry_path(name):
+    os.makedirs(geometry_dir, exist_ok=True)
+    return os.path.join(geometry_dir, name)
+
+
+def _cache_name(path, version, suffix):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{version[:16]}{suffix}"
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Full-resolution country boundaries, read from the shapefile once per process
+def load_world(path=shapefile_path):
+    key = (os.path.abspath(path), file_version(path), None)
+    world = _worlds.get(key)
+    if world is None:
+        with _lock:
+            world = _worlds.get(key)
+            if world is None:
+                import geopandas as gpd  # Imported on first use, it is slow to import and most starts never need it
+                with span('load', os.path.basename(path)):
+                    world = gpd.read_file(path)
+                if world.crs is None:
+                    world = world.set_crs(epsg=4326)  # WGS 84 coordinate reference system
+                _worlds[key] = world
+    return world
+
+
+# Country outlines simplified at one of simplify_tolerances, keeping shared borders shared.
+# Only the geometry and the English name ('NAME_EN', taken from 'NAME') are kept; the result
+# is stored as GeoJSON in .cache/geometry so other processes and restarts skip the simplification.
+def simplified_world(level=default_level, path=shapefile_path):
+    import geopandas as gpd
+
+    version = file_version(path)
+    key = (os.path.abspath(path), version, level)
+    world = _worlds.get(key)
+    if world is not None:
+        return world
+
+    with _lock:
+        world = _worlds.get(key)
+        if world is not None:
+            return world
+        cache_file = geometry_path(_cache_name(path, version, f"-{level}.geojson"))
+        if os.path.exists(cache_file):
+            world = gpd.read_file(cache_file)
+        else:
+            world = None
+    if world is None:
+        full = load_world(path)
+        tolerance = simplify_tolerances[level]
+        with span('table', f"simplified_world:{level}"):
+            outlines = full.geometry.simplify(tolerance, preserve_topology=True).set_precision(tolerance / 10)
+        world = gpd.GeoDataFrame({'NAME_EN': full['NAME'].astype(str)}, geometry=outlines, crs=full.crs)
+        world = world[~world.geometry.is_empty].reset_index(drop=True)
+        _write_atomic(cache_file, world.to_json())
+
+    with _lock:
+        _worlds[key] = world
+    return world
+
+
+# Sorted country names offered by the region dropdowns, plus 'Unknown'
+def country_names(path=shapefile_path):
+    version = file_version(path)
+    key = (os.path.abspath(path), version)
+    countries = _countries.get(key)
+    if countries is not None:
+        return countries
+
+    cache_file = geometry_path(_cache_name(path, version, '-countries.json'))
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            countries = json.load(f)
+    except OSError:
+        countries = [country.strip() for country in load_world(path)['NAME_EN'].unique()]
+        # Replace "People's Republic of China" with "China"
+        countries = ['China' if country == "People's Republic of China" else country for country in countries]
+        countries.append('Unknown')
+        countries = sorted(countries)
+        _write_atomic(cache_file, json.dumps(countries))
+
+    _countries[key] = countries
+    return countries
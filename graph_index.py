@@ -0,0 +1,64 @@
+import pandas as pd
+
+
+# Build the apt <-> technique, technique <-> tactic and technique <-> CVE adjacency of a frame in one pass.
+# Every map keeps the first-appearance order of the frame (like Series.unique()), and the technique maps
+# remember which APTs each edge comes from so the index can later be narrowed to a subset of APTs.
+def build_graph_index(df):
+    apt_techniques = {}    # apt -> {technique: None}, techniques in row order
+    technique_apts = {}    # technique -> {apt: first row position}
+    technique_tactics = {}  # technique -> {tactic: set of apts}
+    technique_cves = {}    # technique -> {cve: set of apts}
+
+    rows = zip(df['apt'], df['technique-id'], df['tactics'], df['cve'])
+    for position, (apt, technique, tactic, cve) in enumerate(rows):
+        if pd.isna(apt) or pd.isna(technique):
+            continue
+        apt_techniques.setdefault(apt, {})[technique] = None
+        technique_apts.setdefault(technique, {}).setdefault(apt, position)
+        if not pd.isna(tactic) and tactic:
+            technique_tactics.setdefault(technique, {}).setdefault(tactic, set()).add(apt)
+        if not pd.isna(cve) and cve:
+            technique_cves.setdefault(technique, {}).setdefault(cve, set()).add(apt)
+
+    return {'apt_techniques': apt_techniques, 'technique_apts': technique_apts,
+            'technique_tactics': technique_tactics, 'technique_cves': technique_cves, 'scope': None,
+            'version': None}
+
+
+# View of an index restricted to the rows of some APTs (what filtering the frame on 'apt' would give)
+def scoped_index(index, apts):
+    return dict(index, scope=frozenset(apts)) if apts else index
+
+
+def _in_scope(index, apt):
+    return index['scope'] is None or apt in index['scope']
+
+
+# Techniques used by an APT, in row order
+def techniques_of(index, apt):
+    if not _in_scope(index, apt):
+        return []
+    return list(index['apt_techniques'].get(apt, ()))
+
+
+# APTs using any of the techniques, ordered by their first matching row
+def apts_using(index, techniques):
+    first_rows = {}
+    for technique in techniques:
+        for apt, position in index['technique_apts'].get(technique, {}).items():
+            if _in_scope(index, apt) and position < first_rows.get(apt, position + 1):
+                first_rows[apt] = position
+    return sorted(first_rows, key=first_rows.get)
+
+
+# Non-empty tactics of a technique
+def tactics_of(index, technique):
+    return [tactic for tactic, apts in index['technique_tactics'].get(technique, {}).items()
+            if index['scope'] is None or not apts.isdisjoint(index['scope'])]
+
+
+# Non-empty CVEs of a technique
+def cves_of(index, technique):
+    return [cve for cve, apts in index['technique_cves'].get(technique, {}).items()
+            if index['scope'] is None or not apts.isdisjoint(index['scope'])]
@@ -0,0 +1,87 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+
+from instrumentation import span
+
+# Graphs with at least this many nodes skip the force-directed layout for the sparse spectral one
+large_graph_nodes = int(os.environ.get('LAYOUT_LARGE_GRAPH_NODES', 500))
+# Iteration caps of the force-directed layout: from scratch, and when most nodes already have a position
+max_iterations = 50
+warm_start_iterations = 15
+# Number of layouts kept per process
+max_cached_layouts = 256
+# Dataset versions whose node positions are kept: the current one, and the one it replaces while its
+# figures finish rendering (every ingested batch makes a new version)
+max_position_versions = 2
+
+_layouts = OrderedDict()  # (graph signature, dataset version) -> {node: (x, y)}
+_known_positions = OrderedDict()  # dataset version -> {node: (x, y)}, the last position each node was drawn at
+_lock = threading.Lock()
+
+
+# Stable fingerprint of a graph's nodes and edges
+def graph_signature(G):
+    digest = hashlib.sha1()
+    for node in sorted(map(str, G.nodes())):
+        digest.update(node.encode('utf-8') + b'\0')
+    digest.update(b'\1')
+    for edge in sorted('\0'.join(sorted(map(str, edge))) for edge in G.edges()):
+        digest.update(edge.encode('utf-8') + b'\1')
+    return digest.hexdigest()
+
+
+# Node positions for a network figure, cached per (graph, dataset version).
+# New graphs start from the positions their nodes had in earlier figures of the same dataset version,
+# so filtering keeps nodes in place, and the number of iterations is capped.
+def compute_layout(G, version=None):
+    key = (graph_signature(G), version)
+    with _lock:
+        pos = _layouts.get(key)
+        if pos is not None:
+            _layouts.move_to_end(key)
+            return pos
+        known = dict(_known_positions.get(version, {}))
+
+    if len(G) >= large_graph_nodes:
+        with span('layout', 'sparse_layout'):
+            pos = sparse_layout(G)
+    elif len(G) > 0:
+        initial = {node: known[node] for node in G if node in known}
+        iterations = warm_start_iterations if len(initial) >= len(G) / 2 else max_iterations
+        with span('layout', 'spring_layout'):
+            pos = nx.spring_layout(G, pos=initial or None, iterations=iterations, seed=42)
+    else:
+        pos = {}
+    pos = {node: (float(x), float(y)) for node, (x, y) in pos.items()}
+
+    with _lock:
+        _layouts[key] = pos
+        while len(_layouts) > max_cached_layouts:
+            _layouts.popitem(last=False)
+        _known_positions.setdefault(version, {}).update(pos)
+        _known_positions.move_to_end(version)
+        while len(_known_positions) > max_position_versions:
+            _known_positions.popitem(last=False)
+    return pos
+
+
+# Layout for large graphs: a spectral layout of each connected component (sparse eigensolver,
+# no per-node Python loops), with the components packed on a grid, biggest first
+def sparse_layout(G):
+    components = sorted(nx.connected_components(G), key=len, reverse=True)
+    columns = math.ceil(math.sqrt(len(components)))
+    pos = {}
+    for i, nodes in enumerate(components):
+        offset_x, offset_y = 2.5 * (i % columns), -2.5 * (i // columns)
+        if len(nodes) < 3:
+            component_pos = nx.circular_layout(G.subgraph(nodes))
+        else:
+            component_pos = nx.spectral_layout(G.subgraph(nodes))
+        for node, (x, y) in component_pos.items():
+            pos[node] = (x + offset_x, y + offset_y)
+    return nx.rescale_layout_dict(pos) if len(pos) > 1 else pos
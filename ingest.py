@@ -0,0 +1,185 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+from dataset import load_dataset, dataset_version
+from instrumentation import span
+from scoring import ThreatActorScoreState
+from summary_metrics import SummaryMetrics
+
+# Directory watched for new rows: every *.jsonl file in it is append-only, one JSON object per line
+# with the (case-insensitive) columns of the dataset. Files are read from the start on every launch.
+ingest_dir = os.environ.get('INGEST_DIR', 'ingest')
+poll_interval = float(os.environ.get('INGEST_POLL_SECONDS', 2))
+
+logger = logging.getLogger(__name__)
+
+# Live state per dataset, keyed by (workbook, sheet)
+_live = {}
+_lock = threading.Lock()
+
+
+# A dataset plus every row ingested since the process started. The per-APT scores and the Summary
+# metrics are updated in place by each batch; ingested batches are kept so they can be replayed
+# on top of a new version of the workbook.
+class LiveDataset:
+    def __init__(self, excel, sheet_name):
+        self.excel = excel
+        self.sheet_name = sheet_name
+        self.batches = []  # Ingested frames, in arrival order
+        self.sources = []  # Where each batch was read from: (file, first byte), or None
+        self.consumed = {}  # file -> SHA-1 of the bytes ingested from it
+        self.digests = []  # SHA-1 of the records of each batch not read from a file, in arrival order
+        self.revision = 0  # Number of batches folded in
+        self.listeners = []  # Called with (frame, affected APTs) after each batch
+        self._lock = threading.Lock()
+        self._rebuild(dataset_version(excel, sheet_name))
+
+    def _rebuild(self, version):
+        with span('table', 'live_dataset'):
+            self._rebuild_from(version)
+
+    def _rebuild_from(self, version):
+        df = load_dataset(self.excel, self.sheet_name)
+        self.version = version
+        self.columns = df.columns
+        self.dtypes = df.dtypes
+        self.scores = ThreatActorScoreState(df)
+        self.summary = SummaryMetrics(df)
+        for frame in self.batches:
+            self.scores.append(frame)
+            self.summary.append(frame)
+
+    # Rebuild from the workbook if it changed on disk (ingested rows are kept)
+    def refresh(self):
+        version = dataset_version(self.excel, self.sheet_name)
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._rebuild(version)
+        return self
+
+    # Add raw records (dicts) to the dataset; returns the APTs whose scores changed. source is where
+    # they were read from, (file, first byte, bytes read), when they come from an ingest file.
+    def ingest(self, records, source=None):
+        frame = self.to_frame(records)
+        with self._lock:
+            if source is not None:
+                path, start, data = source
+                self.consumed.setdefault(path, hashlib.sha1()).update(data)
+            if frame.empty:
+                return set()
+            with span('table', 'live_dataset_append'):
+                affected = self.scores.append(frame)
+                self.summary.append(frame)
+                self.batches.append(frame)
+                self.sources.append(None if source is None else (path, start))
+                if source is None:
+                    self.digests.append(hashlib.sha1(json.dumps(records, sort_keys=True, default=str)
+                                                     .encode()).hexdigest())
+                self.revision += 1
+        for listener in self.listeners:
+            listener(frame, affected)
+        return affected
+
+    # The ingested frames and a digest of what they hold. Rows read from files come first, file by file
+    # in line order, and the digest covers the bytes read from each file: however polls grouped the lines
+    # into batches, the same files give the same frames and digest, in every process and after a restart.
+    # The digest is None when nothing was ingested.
+    def ingested(self):
+        with self._lock:
+            batches, sources = list(self.batches), list(self.sources)
+            consumed = sorted((path, sha1.hexdigest()) for path, sha1 in self.consumed.items())
+            digests = list(self.digests)
+        if not batches:
+            return [], None
+        order = sorted(range(len(batches)), key=lambda i: (sources[i] is None, sources[i] or ('', 0), i))
+        digest = hashlib.sha1(json.dumps([consumed, digests]).encode()).hexdigest()
+        return [batches[i] for i in order], digest
+
+    # Records as a frame with the dataset's columns: names lower-cased, missing columns NaN,
+    # unknown ones dropped, numbers parsed where the dataset has numbers
+    def to_frame(self, records):
+        frame = pd.DataFrame.from_records(records).rename(columns=str.lower).reindex(columns=self.columns)
+        for column, dtype in self.dtypes.items():
+            if pd.api.types.is_numeric_dtype(dtype):
+                frame[column] = pd.to_numeric(frame[column], errors='coerce')
+        return frame
+
+
+# The live dataset of a workbook sheet (created on first use)
+def live_dataset(excel='VisualAmended_v9.xlsx', sheet_name='CleanedDataset'):
+    key = (os.path.abspath(excel), sheet_name)
+    live = _live.get(key)
+    if live is None:
+        with _lock:
+            live = _live.get(key)
+            if live is None:
+                live = _live[key] = LiveDataset(excel, sheet_name)
+    return live.refresh()
+
+
+# Polls a directory for lines appended to its *.jsonl files and feeds them to a live dataset.
+# Only complete lines are read; a line that is not valid JSON is skipped and reported.
+class IngestWatcher(threading.Thread):
+    def __init__(self, live, directory=ingest_dir, interval=poll_interval):
+        super().__init__(name='ingest-watcher', daemon=True)
+        self.live = live
+        self.directory = directory
+        self.interval = interval
+        self.offsets = {}  # file -> bytes already read
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.poll()
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+    # Read and ingest what was appended since the last poll, one batch per file; returns the number of records
+    def poll(self):
+        count = 0
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.jsonl'))):
+            start = self.offsets.get(path, 0)
+            records, data = self._read_new_lines(path)
+            if data:
+                self.live.ingest(records, (os.path.abspath(path), start, data))
+            count += len(records)
+        return count
+
+    def _read_new_lines(self, path):
+        offset = self.offsets.get(path, 0)
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return [], b''
+        complete = data[:data.rfind(b'\n') + 1]  # Leave a partially written last line for the next poll
+        self.offsets[path] = offset + len(complete)
+
+        records = []
+        for line in complete.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning("skipping malformed line in %s: %r", path, line[:80])
+        return records, complete
+
+
+# Start watching ingest_dir for a workbook sheet if the directory exists
+def start_ingest(excel='VisualAmended_v9.xlsx', sheet_name='CleanedDataset', directory=ingest_dir):
+    if not os.path.isdir(directory):
+        return None
+    watcher = IngestWatcher(live_dataset(excel, sheet_name), directory)
+    watcher.start()
+    return watcher
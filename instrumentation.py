@@ -0,0 +1,154 @@
+import bisect
+import cProfile
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import flask
+
+# Upper bounds (seconds) of the histogram buckets, +Inf is implied
+buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Profile every callback request with 'cprofile' or 'pyinstrument'. Without it, a single request can
+# still ask for a profile with the X-Profile header (same values), if it is local like for /metrics.
+# Profiles are written to profile_dir and their path is returned in the X-Profile-File response header.
+profile_mode = os.environ.get('DASHBOARD_PROFILE', '')
+profile_dir = os.environ.get('DASHBOARD_PROFILE_DIR', 'profiles')
+# /metrics and the X-Profile header only answer local requests unless METRICS_ALLOW_REMOTE=1
+metrics_allow_remote = os.environ.get('METRICS_ALLOW_REMOTE', '0') == '1'
+
+callback_path = '/_dash-update-component'
+
+logger = logging.getLogger(__name__)
+
+# Time spent per (kind, name), kept per process (every gunicorn worker exposes its own)
+_histograms = {}  # (kind, name) -> {'counts': per-bucket counts, the last one being +Inf, 'sum', 'count'}
+_lock = threading.Lock()
+_profile_ids = itertools.count(1)
+
+
+def observe(kind, name, seconds):
+    key = (kind, str(name))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'counts': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0}
+        histogram['counts'][bisect.bisect_left(buckets, seconds)] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+
+# Time a block: with span('load', 'VisualAmended_v9.xlsx:CleanedDataset'): ...
+# Kinds used by the dashboard: load, parse, table, layout, build, render, facets, serialize, deserialize, callback,
+# request, startup
+@contextmanager
+def span(kind, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(kind, name, time.perf_counter() - start)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Every histogram in the Prometheus text exposition format
+def render_metrics():
+    with _lock:
+        histograms = {key: {'counts': list(histogram['counts']), 'sum': histogram['sum'], 'count': histogram['count']}
+                      for key, histogram in _histograms.items()}
+
+    lines = ['# HELP dashboard_span_seconds Time spent in data loading, table and figure building, '
+             'serialization, callbacks and requests.',
+             '# TYPE dashboard_span_seconds histogram']
+    for (kind, name), histogram in sorted(histograms.items()):
+        labels = f'kind="{_escape(kind)}",name="{_escape(name)}"'
+        cumulative = 0
+        for bound, count in zip(buckets + ('+Inf',), histogram['counts']):
+            cumulative += count
+            lines.append(f'dashboard_span_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"dashboard_span_seconds_sum{{{labels}}} {histogram['sum']:.6f}")
+        lines.append(f"dashboard_span_seconds_count{{{labels}}} {histogram['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+def _start_profiler(mode):
+    if mode == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed, profiling with cProfile")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return mode, profiler
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # Another request is being profiled (one profiler at a time on Python 3.12+)
+        return None
+    return 'cprofile', profiler
+
+
+def _save_profile(mode, profiler, name):
+    os.makedirs(profile_dir, exist_ok=True)
+    safe_name = re.sub(r'[^\w.-]+', '_', name)[:80]
+    stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_profile_ids)}-{safe_name}"
+    if mode == 'pyinstrument':
+        profiler.stop()
+        path = os.path.join(profile_dir, f"{stem}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.disable()
+        path = os.path.join(profile_dir, f"{stem}.prof")  # Open with python -m pstats or snakeviz
+        profiler.dump_stats(path)
+    return path
+
+
+# Name of the current request: the output of a Dash callback, or the matched route
+def _request_name():
+    if flask.request.path.endswith(callback_path):
+        body = flask.request.get_json(silent=True) or {}
+        return 'callback', body.get('output', '<unknown>')
+    rule = flask.request.url_rule
+    return 'request', rule.rule if rule is not None else '<unmatched>'
+
+
+# Whether the current request may read the metrics or ask for a profile
+def _trusted_request():
+    return metrics_allow_remote or flask.request.remote_addr in ('127.0.0.1', '::1')
+
+
+# Time every request of the Flask server behind the Dash app (callbacks by output id), profile the
+# requests that asked for it and serve the histograms on /metrics
+def instrument_server(server):
+    @server.before_request
+    def start_request():
+        flask.g.instrument_start = time.perf_counter()
+        default_mode = profile_mode if flask.request.path.endswith(callback_path) else ''
+        mode = flask.request.headers.get('X-Profile', default_mode).lower() if _trusted_request() else default_mode
+        flask.g.profiler = _start_profiler(mode) if mode in ('cprofile', 'pyinstrument') else None
+
+    @server.after_request
+    def finish_request(response):
+        start = flask.g.pop('instrument_start', None)
+        if start is None:
+            return response
+        kind, name = _request_name()
+        profiler = flask.g.pop('profiler', None)
+        if profiler is not None:
+            response.headers['X-Profile-File'] = _save_profile(*profiler, name)
+        observe(kind, name, time.perf_counter() - start)
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        if not _trusted_request():
+            flask.abort(403)
+        return flask.Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
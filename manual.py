@@ -1,36 +1,68 @@
-from dash import dcc, html, Output, Input, State, Dash
+from dash import ClientsideFunction, dcc, html, Output, Input, State
 import pandas as pd
-import geopandas as gpd  # Import GeoPandas for geographical data
 import re  # For regex validation
 from dash.exceptions import PreventUpdate
+from registry import dataset_registry
+from geometry import country_names
+from scoring import score_profiles
+from search_index import build_search_index, search_options, searchable
 
-# Initialize the Dash app
-app = Dash(__name__)
+# The dataset
+excel = 'VisualAmended_v9.xlsx'
+data_sheet = 'CleanedDataset'
 
-# Load country names from GeoDataFrame
-geojson_path = r'ne_10m_admin_0_countries/ne_10m_admin_0_countries.shp'  # Update this path
-world = gpd.read_file(geojson_path)
+# Everything the Manual tab reads from the dataset: technique count per APT, region weight per region,
+# tactic weight per tactic id, and the APT and tactic dropdown options. A region or tactic id takes the
+# weight of its first row when the rows are ordered by APT (rows without an APT are ignored).
+def build_manual_lookups(df):
+    rows = df[df['apt'].notna()].sort_values('apt', kind='stable')
+    region_weights = rows.drop_duplicates('region').dropna(subset=['region'])
+    tactic_weights = rows.drop_duplicates('tactic-id').dropna(subset=['tactic-id'])
 
-# Extract the list of country names and sort in ascending order
-countries = (world['NAME_EN'].unique())  # Get unique country names and sort them
-countries = [country.strip() for country in countries]  # Trim spaces from country names
-# Replace "People's Republic of China" with "China"
-countries = ['China' if country == "People's Republic of China" else country for country in countries]
-# Include "Unknown" in the country list
-countries.append("Unknown")
-countries = sorted(countries)
+    # Sort the tactic dropdown by tactics in alphabetical order and append "Unknown"
+    tactic_options = pd.DataFrame(
+        {'tactic-id': df['tactic-id'], 'tactics': df['tactics']}
+    ).drop_duplicates().sort_values(by='tactics')
+
+    # Append the "Unknown" tactic
+    unknown_row = pd.DataFrame({'tactic-id': ['Unknown'], 'tactics': ['Unknown']})
+    tactic_options = pd.concat([tactic_options, unknown_row], ignore_index=True)
+
+    # Sort the DataFrame again to ensure "Unknown" is correctly placed
+    tactic_options = tactic_options.sort_values(by='tactics').values
+
+    return {
+        'technique_counts': rows.groupby('apt', observed=True)['technique-id'].nunique().to_dict(),
+        'region_weights': dict(zip(region_weights['region'], region_weights['region-weight'])),
+        'tactic_weights': dict(zip(tactic_weights['tactic-id'], tactic_weights['tactic-weight'])),
+        # Sort APTs alphabetically
+        'apt_options': [{'label': apt, 'value': apt} for apt in sorted(df['apt'].unique())],
+        'tactic_options': [{'label': f"{tactic_id} - {tactic_description}", 'value': tactic_id}
+                           for tactic_id, tactic_description in tactic_options],
+    }
+
+
+# The lookups are rebuilt with every new snapshot of the dataset (including ingested rows)
+registry = dataset_registry(excel, data_sheet, live=True)
+registry.register('manual_lookups', lambda snapshot: build_manual_lookups(snapshot.df))
 
-# Load the dataset
-excel = 'VisualAmended_v9.xlsx'
-data_sheet = 'CleanedDataset'
-df = pd.read_excel(excel, sheet_name=data_sheet)
 
-# Calculate the number of techniques used by each APT
-df_techniques = df.groupby('apt')['technique-id'].nunique().reset_index()
-df_techniques.columns = ['apt', 'Number_of_Techniques_Used']
+# Search indexes of the dropdowns, keyed by dropdown id: they ship without options and load the matches
+# of what is typed (also served as /search/<dropdown id>)
+def build_manual_search(lookups):
+    return {
+        'apt-dropdown': build_search_index(lookups['apt_options']),
+        'tactic-dropdown': build_search_index(lookups['tactic_options']),
+        'region-dropdown': build_search_index([{'label': country, 'value': country}
+                                               for country in country_names()]),  # Cached on disk
+    }
 
-# Combine to the dataset
-df_final = pd.merge(df_techniques, df, on='apt')
+
+registry.register('manual_search', lambda snapshot: build_manual_search(snapshot['manual_lookups']))
+searched_dropdowns = ['apt-dropdown', 'tactic-dropdown', 'region-dropdown']
+for _dropdown_id in searched_dropdowns:
+    searchable[_dropdown_id] = (lambda dropdown_id=_dropdown_id:
+                                registry.current()['manual_search'][dropdown_id])
 
 colors = {
     'background': '#f9f9f9',
@@ -90,19 +122,8 @@ colors = {
 #         return 'Highly Critical'
 
 # Initialize the layout for the manual tab
-def manual_layout(df):
-    # Sort the tactic dropdown by tactics in alphabetical order and append "Unknown"
-    tactic_options = pd.DataFrame(
-        {'tactic-id': df['tactic-id'], 'tactics': df['tactics']}
-    ).drop_duplicates().sort_values(by='tactics')
-
-    # Append the "Unknown" tactic
-    unknown_row = pd.DataFrame({'tactic-id': ['Unknown'], 'tactics': ['Unknown']})
-    tactic_options = pd.concat([tactic_options, unknown_row], ignore_index=True)
-
-    # Sort the DataFrame again to ensure "Unknown" is correctly placed
-    tactic_options = tactic_options.sort_values(by='tactics').values
-
+# (the dropdowns start empty and search the lookups of the dataset as the user types)
+def manual_layout():
     return dcc.Tab(label='Manual', children=[
         html.Div([
             html.H2("Configure Individual Algorithm Parameters",
@@ -122,9 +143,8 @@ def manual_layout(df):
 
             dcc.Dropdown(
                 id='apt-dropdown',
-                options=[{'label': apt, 'value': apt} for apt in sorted(df['apt'].unique())],
-                # Sort APTs alphabetically
-                placeholder="Select a Threat Actor",
+                options=[],
+                placeholder="Select a Threat Actor (type to search)",
                 disabled=False  # Enabled by default
             ),
             html.Div(style={'height': '10px'}),  # Spacing
@@ -154,9 +174,8 @@ def manual_layout(df):
             html.Label("Select a Tactic: "),
             dcc.Dropdown(
                 id='tactic-dropdown',
-                options=[{'label': f"{tactic_id} - {tactic_description}", 'value': tactic_id}
-                         for tactic_id, tactic_description in tactic_options],
-                placeholder="Select Tactic"
+                options=[],
+                placeholder="Select Tactic (type to search)"
             ),
             html.Div(style={'height': '10px'}),  # Spacing
 
@@ -167,8 +186,8 @@ def manual_layout(df):
             html.Label("Select an Origin Region: "),
             dcc.Dropdown(
                 id='region-dropdown',
-                options=[{'label': country, 'value': country} for country in countries],
-                placeholder="Select Region"
+                options=[],
+                placeholder="Select Region (type to search)"
             ),
             html.Div(style={'height': '10px'}),  # Spacing
 
@@ -257,22 +276,36 @@ def manual_layout(df):
     ])
 
 
+def _search_callback(dropdown_id):
+    def update(search_value, value):
+        if not search_value:
+            raise PreventUpdate
+        return search_options(registry.current()['manual_search'][dropdown_id], search_value, value)
+
+    return update
+
+
 # Register callbacks for the manual tab
 def manual_callbacks(app):
-    # Callback for apt
-    @app.callback(
+    # Existing or new threat actor: show the APT dropdown or the new APT input, in the browser
+    # (apt_inputs in assets/clientside.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='apt_inputs'),
         [Output('apt-dropdown', 'style'),
          Output('new-apt-label', 'style'),
          Output('new-apt', 'style')],
         Input('apt-selection', 'value')
     )
-    def update_apt_inputs(selection):
-        if selection == 'existing':
-            # Show the dropdown and hide the new APT input field
-            return {'display': 'block'}, {'display': 'none'}, {'display': 'none'}
-        else:
-            # Hide the dropdown and show the new APT input field and label
-            return {'display': 'none'}, {'display': 'block'}, {'display': 'block'}
+
+    # The searched dropdowns load the matches of what is typed; once the user picks one (and the search
+    # is cleared) the matches stay listed, the selected option among them
+    for dropdown_id in searched_dropdowns:
+        app.callback(
+            Output(dropdown_id, 'options'),
+            Input(dropdown_id, 'search_value'),
+            State(dropdown_id, 'value'),
+            prevent_initial_call=True
+        )(_search_callback(dropdown_id))
 
     # Callback to dynamically display the number of techniques for a selected threat actor
     @app.callback(
@@ -282,7 +315,7 @@ def manual_callbacks(app):
     def update_technique_count(selected_apt):
         if selected_apt:
             # Fetch the number of techniques associated with the selected threat actor
-            techniques_count = df_final.loc[df_final['apt'] == selected_apt, 'technique-id'].nunique()
+            techniques_count = registry.current()['manual_lookups']['technique_counts'].get(selected_apt, 0)
             return f"Existing technique count for selected Threat Actor: {techniques_count}"
         return ""
 
@@ -300,13 +333,12 @@ def manual_callbacks(app):
             if selected_region == "Unknown":
                 return "No existing region weight. Enter a region weight (max=31):", {'display': 'block'}, None
 
-            # Assuming 'Region Weight' is a column in your dataframe (adjust as necessary)
-            region_weight = df_final.loc[df_final['region'] == selected_region, 'region-weight'].values
+            region_weight = registry.current()['manual_lookups']['region_weights'].get(selected_region)
 
-            if region_weight.size > 0:
+            if region_weight is not None:
                 # Format the weight to 2 decimal points
-                formatted_weight = f"{region_weight[0]:.2f}"
-                return f"Region Weight for {selected_region}: {formatted_weight}", {'display': 'none'}, region_weight[0]
+                formatted_weight = f"{region_weight:.2f}"
+                return f"Region Weight for {selected_region}: {formatted_weight}", {'display': 'none'}, region_weight
             else:
                 return "No existing region weight. Enter a region weight (max=31):", {'display': 'block'}, None
 
@@ -324,11 +356,11 @@ def manual_callbacks(app):
                 return 14   # Return 0 for "Unknown" tactic
 
             # Otherwise, lookup the tactic weight
-            tactic_weight = df_final.loc[df_final['tactic-id'] == selected_tactic, 'tactic-weight']
+            tactic_weight = registry.current()['manual_lookups']['tactic_weights'].get(selected_tactic)
 
             # Return the tactic weight directly as an integer, if available
-            if not tactic_weight.empty:
-                return int(tactic_weight.values[0])  # Return integer value directly
+            if tactic_weight is not None:
+                return int(tactic_weight)  # Return integer value directly
             else:
                 return "Tactic Weight not available."
 
@@ -415,49 +447,16 @@ def manual_callbacks(app):
             output_data.append(("IoC Weight", ioc_weight))
             output_data.append(("Time (No. of Years)", time))
 
-            # Calculate complexity
-            complexity = int(new_tech) + int(new_platform) + tactic_weight
-
-            # Define the integrate_time function
-            def integrate_time(t):
-                return (t ** 2 - 1) / 2
-
-            # Calculate Prevalence using integration of time
-            prevalence = (region_weight +
-                          int(cvss) +
-                          int(new_platform) +
-                          int(impact_score) +
-                          int(ioc_weight) +
-                          integrate_time(int(time)))
-            if prevalence <= 0:
-                prevalence = (region_weight +
-                              int(cvss) +
-                              int(new_platform) +
-                              int(impact_score) +
-                              int(ioc_weight) +
-                              integrate_time(int(time) +1))
-            # Calculate the Final Threat Actor Score
-            actor_score = (complexity * prevalence)
-            max_score = 27285.75 #The max is set as per the maximum possible according to the algorithm
-            score=(actor_score/max_score)*100 # calculating the threat actor as percentage
-            # score = (actor_score / max_score) * 100 if actor_score <= max_score else 100
-
-            # score = min(score, 100)
-            # Define a function to categorize the Threat Actor Score Percentage
-            def categorize_score(score):
-                if 0 <= score <= 19.99:
-                    return 'Very Low'
-                elif 20 <= score <= 39.99:
-                    return 'Low'
-                elif 40 <= score <= 59.99:
-                    return 'Moderate'
-                elif 60 <= score <= 79.99:
-                    return 'Critical'
-                else:
-                    return 'Highly Critical'
-
-            # Directly categorize the Threat Actor Score
-            category = categorize_score(score)
+            # Score the profile with the batch scorer (complexity x prevalence, as a percentage of the maximum)
+            result = score_profiles({
+                'techniques': [new_tech], 'tactic-weight': [tactic_weight], 'region-weight': [region_weight],
+                'cvss-base-score': [cvss], 'platform-count': [new_platform], 'impact-score': [impact_score],
+                'ioc-weight': [ioc_weight], 'time': [time],
+            }).iloc[0]
+            complexity = int(result['Complexity'])
+            prevalence = result['Prevalence']
+            score = result['Threat_Actor_Score_Percentage']
+            category = result['Threat_Actor_Category']
 
             # Append complexity, prevalence, and score to output data
             output_data.append(("Complexity", complexity))
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+# Bridge table of a frame's 'platforms' column: one ('row', 'platform') pair per platform of a row, where
+# 'row' is the row's index label and 'platform' a categorical (sorted categories, so grouping on it orders
+# platforms like grouping on the strings would). NaNs count as an empty platform, like fillna('').
+def build_platform_table(df):
+    platforms = df['platforms'].astype(object).fillna('').str.split(',').explode().str.strip().dropna()
+    return pd.DataFrame({
+        'row': platforms.index.to_numpy(),
+        'platform': pd.Categorical(platforms.to_numpy(), categories=sorted(platforms.unique())),
+    })
+
+
+# Platform names in order of first appearance
+def platform_names(table):
+    return list(pd.unique(table['platform']))
+
+
+# Columns of the rows of df, repeated once per platform of the row, with the platform in a
+# categorical 'platform' column (what splitting and exploding 'platforms' would give).
+# df may be any row subset of the frame the table was built from.
+def expand_platforms(df, table, columns, selected_platforms=None):
+    positions = df.index.get_indexer(table['row'])
+    keep = positions >= 0
+    if selected_platforms:
+        keep &= table['platform'].isin(selected_platforms).to_numpy()
+    expanded = df[columns].take(positions[keep])
+    expanded['platform'] = table['platform'].array[keep]
+    return expanded
+
+
+# The n most frequent platforms of an expanded frame, ties going to the platform seen first
+def top_platforms(expanded, n=10):
+    codes = expanded['platform'].cat.codes.to_numpy()
+    if len(codes) == 0:
+        return []
+    observed, first_seen, counts = np.unique(codes, return_index=True, return_counts=True)
+    order = np.lexsort((first_seen, -counts))[:n]
+    return list(expanded['platform'].cat.categories[observed[order]])
@@ -0,0 +1,153 @@
+import logging
+import os
+import threading
+
+import pandas as pd
+
+from dataset import compact_frame, load_dataset, dataset_version
+from ingest import live_dataset
+from instrumentation import span
+
+# How often the watcher looks at the workbooks (seconds)
+refresh_interval = float(os.environ.get('DATASET_REFRESH_SECONDS', 5))
+
+logger = logging.getLogger(__name__)
+
+# Registries already created in this process, keyed by (workbook, sheet)
+_registries = {}
+_lock = threading.Lock()
+_watcher = None
+
+
+# One immutable version of a dataset: the frame, its version string, and the tables derived from it.
+# Tables are built by the builders registered on the registry, on first use (or ahead of time by
+# the background rebuild), and never change afterwards.
+class Snapshot:
+    def __init__(self, registry, version, df):
+        self.registry = registry
+        self.version = version
+        self.df = df
+        self._tables = {}
+        self._lock = threading.RLock()  # Reentrant: a builder may use other tables of the snapshot
+
+    def __getitem__(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(name)
+                if table is None:
+                    with span('table', name):
+                        table = self._tables[name] = self.registry.builders[name](self)
+        return table
+
+    def warm_up(self):
+        for name in list(self.registry.builders):
+            self[name]
+
+
+# The current snapshot of a workbook sheet. Layouts and callbacks read registry.current() on every
+# call; when the workbook changes on disk (or, for live registries, when rows are ingested) the
+# watcher builds the next snapshot in the background, with all its tables, and swaps it in at once.
+# Until then requests keep being served from the previous snapshot.
+class DatasetRegistry:
+    def __init__(self, excel, sheet_name, live=False):
+        self.excel = excel
+        self.sheet_name = sheet_name
+        self.live = live
+        self.builders = {}  # table name -> function(snapshot) building it
+        self.listeners = []  # Called with every new snapshot once it is swapped in
+        self._current = None
+        self._lock = threading.Lock()
+
+    # Declare a derived table, e.g. registry.register('graph_index', lambda snapshot: ...)
+    def register(self, name, build):
+        self.builders[name] = build
+
+    def current(self):
+        snapshot = self._current
+        if snapshot is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = self._snapshot(load_dataset(self.excel, self.sheet_name))
+                snapshot = self._current
+        return snapshot
+
+    # Build and swap in a new snapshot if the source changed; returns True if it did
+    def refresh(self):
+        df = load_dataset(self.excel, self.sheet_name, reload=True)
+        if self._current is not None and self._source()[0] == self._current.version:
+            return False
+        snapshot = self._snapshot(df)
+        snapshot.warm_up()
+        self._current = snapshot  # Atomic swap: requests see either the old or the new snapshot
+        for listener in self.listeners:
+            listener(snapshot)
+        return True
+
+    # Version of the source (workbook version, plus a digest of the ingested rows) and the ingested batches
+    def _source(self):
+        version = dataset_version(self.excel, self.sheet_name)
+        batches, digest = live_dataset(self.excel, self.sheet_name).ingested() if self.live else ([], None)
+        if batches:
+            version = f"{version}+{digest}"
+        return version, batches
+
+    def _snapshot(self, df):
+        version, batches = self._source()
+        if batches:
+            df = compact_frame(pd.concat([df] + batches, ignore_index=True))  # Ingested rows are plain objects
+        return Snapshot(self, version, df)
+
+
+# The registry of a workbook sheet (live=True also includes the rows ingested from INGEST_DIR)
+def dataset_registry(excel='VisualAmended_v9.xlsx', sheet_name='CleanedDataset', live=False):
+    key = (os.path.abspath(excel), sheet_name)
+    registry = _registries.get(key)
+    if registry is None:
+        with _lock:
+            registry = _registries.get(key)
+            if registry is None:
+                registry = _registries[key] = DatasetRegistry(excel, sheet_name, live)
+    registry.live = registry.live or live
+    return registry
+
+
+# Start the background thread refreshing every registry every refresh_interval seconds
+# (or as soon as refresh_soon() is called, e.g. when rows are ingested)
+def start_watching(interval=refresh_interval):
+    global _watcher
+    with _lock:
+        if _watcher is None:
+            _watcher = RegistryWatcher(interval)
+            _watcher.start()
+    return _watcher
+
+
+# Build the current snapshot of every registry with all its tables
+def warm_up_registries():
+    for registry in list(_registries.values()):
+        registry.current().warm_up()
+
+
+def refresh_soon():
+    if _watcher is not None:
+        _watcher.wake.set()
+
+
+class RegistryWatcher(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(name='dataset-registry', daemon=True)
+        self.interval = interval
+        self.wake = threading.Event()
+
+    def run(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            for registry in list(_registries.values()):
+                try:
+                    if registry.refresh():
+                        logger.info("%s [%s] now at version %s", registry.excel, registry.sheet_name,
+                                    registry.current().version[:16])
+                except Exception:  # Keep serving the current snapshot, try again next time
+                    logger.exception("could not refresh %s [%s]", registry.excel, registry.sheet_name)
@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pyarrow.feather as feather
+
+from dataset import cache_path
+from instrumentation import span
+
+# Processes rendering figures next to the dashboard, so the CPU-bound builders of a group (the network
+# layouts hold the GIL) run side by side instead of one after another. 0 renders in the callback thread.
+# Every dashboard process (e.g. each gunicorn worker) starts its own pool.
+render_workers = int(os.environ.get('RENDER_WORKERS', min(4, (os.cpu_count() or 1) - 1)))
+
+_pool = None
+_lock = threading.Lock()
+_exports = {}  # (workbook, sheet) -> (version, Arrow file) of the last snapshot handed to the workers
+
+# In the workers: the snapshot loaded from the last Arrow file, per (workbook, sheet)
+_snapshots = {}
+
+
+# The pool, started on first use (None when rendering in-process)
+def _get_pool():
+    global _pool
+    if render_workers <= 0:
+        return None
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                # Spawned rather than forked: the dashboard process runs threads (watcher, ingest, requests)
+                _pool = ProcessPoolExecutor(max_workers=render_workers, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Write the frame of a snapshot once per version as an uncompressed Arrow file, which the workers
+# memory-map instead of receiving the frame with every task. Older versions are deleted.
+def _export(snapshot):
+    key = (snapshot.registry.excel, snapshot.registry.sheet_name)
+    export = _exports.get(key)
+    if export is not None and export[0] == snapshot.version and os.path.exists(export[1]):
+        return export[1]
+
+    with _lock:
+        export = _exports.get(key)
+        if export is None or export[0] != snapshot.version or not os.path.exists(export[1]):
+            stem = os.path.splitext(os.path.basename(snapshot.registry.excel))[0]
+            version = re.sub(r'[^\w.-]+', '_', snapshot.version)
+            path = cache_path(f"{stem}-{snapshot.registry.sheet_name}-{version}.arrow")
+            if not os.path.exists(path):
+                with span('serialize', 'render_pool.snapshot'):
+                    tmp_path = f"{path}.{os.getpid()}.tmp"
+                    feather.write_feather(snapshot.df, tmp_path, compression='uncompressed')
+                    os.replace(tmp_path, path)
+            if export is not None and export[1] != path:
+                try:
+                    # Workers mapping it keep reading it; another dashboard process still serving that
+                    # version writes it again
+                    os.remove(export[1])
+                except OSError:
+                    pass
+            export = _exports[key] = (snapshot.version, path)
+    return export[1]
+
+
+# In a worker: a snapshot of the registry with its own lazily built tables, loaded once per version
+def _worker_snapshot(excel, sheet_name, version, path):
+    from registry import Snapshot, dataset_registry
+
+    snapshot = _snapshots.get((excel, sheet_name))
+    if snapshot is None or snapshot.version != version:
+        with span('load', 'render_pool.snapshot'):
+            df = feather.read_table(path, memory_map=True).to_pandas()
+        snapshot = _snapshots[(excel, sheet_name)] = Snapshot(dataset_registry(excel, sheet_name), version, df)
+    return snapshot
+
+
+def _render(function, excel, sheet_name, version, path, args):
+    return function(_worker_snapshot(excel, sheet_name, version, path), *args)
+
+
+def _warm(module, excel, sheet_name, version, path):
+    __import__(module)  # Registers the builders of the module's tables
+    _worker_snapshot(excel, sheet_name, version, path).warm_up()
+
+
+# Call function(snapshot, *args) in a render worker, on the worker's copy of the snapshot, and return
+# its result. function must be defined at the top level of a module and its result must pickle cheaply
+# (e.g. figure JSON). Runs in the calling thread when the pool is disabled or broken.
+def render(function, snapshot, *args):
+    pool = _get_pool()
+    if pool is None:
+        return function(snapshot, *args)
+    try:
+        try:
+            return _submit(pool, _render, function, snapshot, args).result()
+        except FileNotFoundError:  # The file was replaced by another process before the worker mapped it
+            return _submit(pool, _render, function, snapshot, args).result()
+    except BrokenProcessPool:  # A worker died (e.g. out of memory): start a new pool next time
+        _discard_pool(pool)
+        return function(snapshot, *args)
+
+
+def _submit(pool, task, function, snapshot, *args):
+    return pool.submit(task, function, snapshot.registry.excel, snapshot.registry.sheet_name, snapshot.version,
+                       _export(snapshot), *args)
+
+
+# Start the workers ahead of the first render: each imports module (whose registry holds the table
+# builders), maps the snapshot and builds its tables. One task per worker, roughly: the pool hands
+# them to whichever worker is free. Returns the futures of the tasks.
+def warm_up(module, snapshot):
+    pool = _get_pool()
+    if pool is None:
+        return []
+    return [_submit(pool, _warm, module, snapshot) for _ in range(render_workers)]
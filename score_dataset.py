@@ -0,0 +1,131 @@
+# Command-line scoring of a whole dataset, without the dashboard: per-APT Complexity, Prevalence and
+# Threat Actor Score (percentage and category) of an Excel workbook, CSV or Parquet file, the table the
+# Autonomous tab shows. Only the scoring columns are read; the file is cut into chunks, each chunk is
+# reduced to per-APT sums (in --workers processes) and the sums are merged, so memory grows with the
+# number of APTs rather than rows.
+#
+#   python score_dataset.py VisualAmended_v9.xlsx --sheet CleanedDataset -o scores.parquet
+#   python score_dataset.py RawDataset.xlsx --rename tactic-score=tactic-weight -o scores.csv
+#   python score_dataset.py nightly.parquet --workers 8 -o scores.json
+import argparse
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from scoring import ThreatActorScoreState, score_input_columns, summarize_rows
+
+numeric_columns = [column for column in score_input_columns if column not in ('apt', 'technique-id')]
+
+
+# Map the file's column names to the scoring columns: names are lower-cased like load_dataset does,
+# then renamed ({'tactic-score': 'tactic-weight'}). Returns {column in the file: scoring column}.
+def column_mapping(names, renames):
+    mapping = {}
+    for name in names:
+        column = str(name).lower()
+        column = renames.get(column, column)
+        if column in score_input_columns and column not in mapping.values():
+            mapping[name] = column
+    missing = [column for column in score_input_columns if column not in mapping.values()]
+    if missing:
+        raise ValueError(f"missing column(s) {', '.join(missing)}; map other names with --rename old=new")
+    return mapping
+
+
+# The scoring columns of a file, chunksize rows at a time
+def read_chunks(path, renames, sheet_name=0, chunksize=200_000):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        import pyarrow.parquet as pq
+        source = pq.ParquetFile(path)
+        mapping = column_mapping(source.schema_arrow.names, renames)
+        chunks = (batch.to_pandas() for batch in source.iter_batches(batch_size=chunksize, columns=list(mapping)))
+    elif extension == '.csv':
+        mapping = column_mapping(pd.read_csv(path, nrows=0).columns, renames)
+        chunks = pd.read_csv(path, usecols=list(mapping), chunksize=chunksize)
+    elif extension in ('.xlsx', '.xlsm', '.xls'):
+        wanted = lambda name: renames.get(str(name).lower(), str(name).lower()) in score_input_columns
+        sheet = pd.read_excel(path, sheet_name=sheet_name, usecols=wanted)  # Workbooks cannot be streamed
+        mapping = column_mapping(sheet.columns, renames)
+        chunks = (sheet.iloc[start:start + chunksize] for start in range(0, len(sheet), chunksize))
+    else:
+        raise ValueError(f"unsupported input {path}: expected .xlsx, .csv or .parquet")
+
+    for chunk in chunks:
+        chunk = chunk[list(mapping)].rename(columns=mapping)
+        for column in numeric_columns:
+            chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+        yield chunk
+
+
+# Per-APT score table of a file, laid out like compute_threat_actor_scores. With several workers, at most
+# two chunks per worker are read ahead of the merge (pool.map would read the whole file up front), and
+# their sums are merged in the order they complete.
+def score_file(path, renames=None, sheet_name=0, workers=1, chunksize=200_000):
+    state = ThreatActorScoreState()
+    chunks = read_chunks(path, renames or {}, sheet_name, chunksize)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for chunk in chunks:
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        state.merge(*future.result())
+                pending.add(pool.submit(summarize_rows, chunk))
+            for future in wait(pending).done:
+                state.merge(*future.result())
+    else:
+        for chunk in chunks:
+            state.append(chunk)
+    return state.table()
+
+
+def write_table(table, path):
+    extension = os.path.splitext(path)[1].lower()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if extension == '.parquet':
+        table.to_parquet(tmp_path, index=False)
+    elif extension == '.csv':
+        table.to_csv(tmp_path, index=False)
+    elif extension == '.json':
+        table.to_json(tmp_path, orient='records', indent=2)
+    else:
+        raise ValueError(f"unsupported output {path}: expected .parquet, .csv or .json")
+    os.replace(tmp_path, path)  # A nightly job never leaves half a file behind
+
+
+def _rename(value):
+    old, separator, new = value.partition('=')
+    if not separator or not old or not new:
+        raise argparse.ArgumentTypeError(f"expected old=new, got {value!r}")
+    return old.lower(), new.lower()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-APT threat actor scores of a dataset')
+    parser.add_argument('input', help='.xlsx workbook, .csv or .parquet file with one row per APT technique')
+    parser.add_argument('-o', '--output', help='.parquet, .csv or .json file (default: print the table)')
+    parser.add_argument('--sheet', default=0, help='sheet of a workbook (default: the first one)')
+    parser.add_argument('--rename', type=_rename, action='append', default=[], metavar='OLD=NEW',
+                        help='read column OLD as NEW, e.g. tactic-score=tactic-weight (repeatable)')
+    parser.add_argument('--workers', type=int, default=1, help='processes summarizing chunks (default: 1)')
+    parser.add_argument('--chunksize', type=int, default=200_000, help='rows per chunk (default: 200000)')
+    args = parser.parse_args(argv)
+
+    try:
+        table = score_file(args.input, dict(args.rename), args.sheet, args.workers, args.chunksize)
+        if args.output:
+            write_table(table, args.output)
+            print(f"{len(table)} threat actors scored into {args.output}", file=sys.stderr)
+        else:
+            print(table[['apt', 'Complexity', 'Prevalence', 'Threat_Actor_Score_Percentage',
+                         'Threat_Actor_Category']].to_string(index=False))
+    except (OSError, ValueError) as error:
+        parser.exit(1, f"{parser.prog}: error: {error}\n")
+
+
+if __name__ == '__main__':
+    main()
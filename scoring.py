@@ -0,0 +1,284 @@
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Threat Actor Score Percentage bands, anything outside them is 'Highly Critical'
+score_bands = [
+    (0, 19.99, 'Very Low'),
+    (20, 39.99, 'Low'),
+    (40, 59.99, 'Moderate'),
+    (60, 79.99, 'Critical'),
+]
+
+# Highest score the manual formula can reach, used to express a profile's score as a percentage
+max_manual_score = 27285.75
+# Running sums and rounded means kept per APT by ThreatActorScoreState
+_sum_columns = ['c', 'c_rows', 'p', 'p_rows', 'score_p', 'cp', 'score_rows']
+_mean_columns = ['Number_of_Techniques_Used', 'Complexity', 'Prevalence', 'Threat_Actor_Score']
+# Columns compute_threat_actor_scores reads from a dataset
+score_input_columns = ['apt', 'technique-id', 'platform-count', 'tactic-weight', 'region-weight', 'impact-score',
+                       'cvss-base-score', 'ioc-weight', 'time']
+weight_columns = [column for column in score_input_columns if column not in ('apt', 'technique-id')]
+# Columns of a profile scored by the manual formula
+profile_columns = ['techniques', 'tactic-weight', 'region-weight', 'cvss-base-score', 'platform-count',
+                   'impact-score', 'ioc-weight', 'time']
+
+
+# Integrate Time (closed form, works on scalars and arrays)
+def integrate_time(t):
+    return (t ** 2 - 1) / 2
+
+
+# Categorize Threat Actor Score Percentages in one pass
+def categorize_scores(scores):
+    scores = np.asarray(scores, dtype=float)
+    conditions = [(low <= scores) & (scores <= high) for low, high, _ in score_bands]
+    return np.select(conditions, [label for _, _, label in score_bands], default='Highly Critical')
+
+
+# The numeric scoring columns of a frame as float64: the dataset keeps them in narrower types
+# (see dataset.compact_frame), which must not leak into the sums
+def _weights(df):
+    return {column: df[column].astype(np.float64) for column in weight_columns}
+
+
+# Compute Complexity, Prevalence, Threat_Actor_Score (percentage and category) for every APT
+def compute_threat_actor_scores(df):
+    # Number of techniques used by each APT, broadcast to its rows
+    number_of_techniques = df.groupby('apt', observed=True)['technique-id'].transform('nunique')
+
+    # Row-level Complexity, Prevalence (using integration of time) and the Final Threat Actor Score
+    weights = _weights(df)
+    complexity = number_of_techniques + weights['platform-count'] + weights['tactic-weight']
+    prevalence = (weights['region-weight'] + weights['impact-score'] + weights['cvss-base-score'] +
+                  weights['ioc-weight'] + integrate_time(weights['time']))
+    df_rows = pd.DataFrame({
+        'apt': df['apt'],
+        'Number_of_Techniques_Used': number_of_techniques,
+        'Complexity': complexity,
+        'Prevalence': prevalence,
+        'Threat_Actor_Score': complexity * prevalence,
+    })
+
+    # Calculate the average as there are several entries for each threat actor
+    df_avg_scores = df_rows.groupby('apt', as_index=False, observed=True).mean()
+    df_avg_scores['apt'] = df_avg_scores['apt'].astype(object)
+
+    # Rounding the scores to 2 decimal points
+    df_avg_scores[['Complexity', 'Prevalence', 'Threat_Actor_Score']] = (
+        df_avg_scores[['Complexity', 'Prevalence', 'Threat_Actor_Score']].round(2))
+
+    # Calculate Threat Actor Score as a percentage of the (padded) min/max range
+    min_score = df_avg_scores['Threat_Actor_Score'].min() - 1
+    max_score = df_avg_scores['Threat_Actor_Score'].max() + 1
+    df_avg_scores['Threat_Actor_Score_Percentage'] = (
+        ((df_avg_scores['Threat_Actor_Score'] - min_score) / (max_score - min_score)) * 100).round(2)
+
+    df_avg_scores['Threat_Actor_Category'] = categorize_scores(df_avg_scores['Threat_Actor_Score_Percentage'])
+    return df_avg_scores
+
+
+# Score threat actor profiles with the manual formula, one row per profile. Like the Manual tab, every
+# input but the tactic and region weights is truncated to an integer, and a profile whose Prevalence is
+# not positive is re-scored with one more year. Missing inputs give NaN scores and no category.
+def score_profiles(profiles):
+    values = {column: np.asarray(profiles[column], dtype=float) for column in profile_columns}
+    platform_count = np.trunc(values['platform-count'])
+    time = np.trunc(values['time'])
+
+    complexity = np.trunc(values['techniques']) + platform_count + values['tactic-weight']
+    base_prevalence = (values['region-weight'] + np.trunc(values['cvss-base-score']) + platform_count +
+                       np.trunc(values['impact-score']) + np.trunc(values['ioc-weight']))
+    prevalence = base_prevalence + integrate_time(time)
+    prevalence = np.where(prevalence <= 0, base_prevalence + integrate_time(time + 1), prevalence)
+
+    actor_score = complexity * prevalence
+    score = (actor_score / max_manual_score) * 100
+    category = categorize_scores(score).astype(object)
+    category[np.isnan(score)] = None
+    return pd.DataFrame({
+        'Complexity': complexity,
+        'Prevalence': prevalence,
+        'Threat_Actor_Score': actor_score,
+        'Threat_Actor_Score_Percentage': score,
+        'Threat_Actor_Category': category,
+    }, index=getattr(profiles, 'index', None))
+
+
+# Score a CSV or Parquet file of profiles chunk by chunk, yielding each chunk with its scores appended
+def iter_scored_profiles(path, chunksize=100_000):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunksize)
+    for chunk in chunks:
+        yield pd.concat([chunk, score_profiles(chunk)], axis=1)
+
+
+# Arrow schema of every chunk of a scored Parquet file, from the first one: its integer columns become
+# floats (a later chunk with a missing value has them as floats) and its columns without a value strings
+def _scored_file_schema(table):
+    import pyarrow as pa
+    fields = []
+    for field, column in zip(table.schema, table.columns):
+        if column.null_count == len(column):
+            field = field.with_type(pa.string())
+        elif pa.types.is_integer(field.type):
+            field = field.with_type(pa.float64())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+# Score a CSV or Parquet file of profiles into another one, never holding more than one chunk in memory.
+# The file is written next to the destination and moved over it once complete, so a failed export
+# leaves no truncated file behind.
+def score_profile_file(source, destination, chunksize=100_000):
+    parquet = destination.endswith('.parquet')
+    if parquet:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    tmp_destination = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+    writer = None
+    rows = 0
+    try:
+        for i, chunk in enumerate(iter_scored_profiles(source, chunksize)):
+            if parquet:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_destination, _scored_file_schema(table))
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk.to_csv(tmp_destination, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows += len(chunk)
+        if writer is not None:
+            writer.close()
+            writer = None
+        if os.path.exists(tmp_destination):
+            os.replace(tmp_destination, destination)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_destination):
+            os.remove(tmp_destination)
+    return rows
+
+
+# Running per-APT sums behind compute_threat_actor_scores, so that appended rows only re-average their own APTs.
+# With n the number of techniques of an APT, c = platform-count + tactic-weight and p the Prevalence of a
+# row, the mean Complexity is n + mean(c) and the mean Threat_Actor_Score is n * mean(p) + mean(c * p).
+# Percentages depend on the min/max score over all APTs: when those move, every record is recomputed.
+class ThreatActorScoreState:
+    def __init__(self, df=None):
+        self.sums = pd.DataFrame(columns=_sum_columns, dtype=float)  # apt -> running sums, see _partial_sums
+        self.technique_counts = {}  # apt -> number of distinct technique ids
+        self.means = pd.DataFrame(columns=_mean_columns, dtype=float)  # apt -> rounded means
+        self.min_score = self.max_score = None
+        self._pairs = set()  # (apt, technique id) pairs seen so far
+        self._lock = threading.Lock()
+        if df is not None:
+            self.append(df)
+
+    # Fold new rows in; returns the APTs whose score record changed (all of them if min/max moved)
+    def append(self, df):
+        return self.merge(*summarize_rows(df))
+
+    # Fold in the summary of rows made by summarize_rows (e.g. in another process)
+    def merge(self, partial, techniques):
+        if partial.empty:
+            return set()
+
+        with self._lock:
+            affected = list(partial.index)
+            self.sums = partial if self.sums.empty else self.sums.add(partial, fill_value=0)
+            new_pairs = set(zip(techniques['apt'], techniques['technique-id'])) - self._pairs
+            self._pairs |= new_pairs
+            for apt, count in Counter(apt for apt, _ in new_pairs).items():
+                self.technique_counts[apt] = self.technique_counts.get(apt, 0) + count
+
+            means = _means(self.sums.loc[affected], [self.technique_counts.get(apt, 0) for apt in affected])
+            self.means = means if self.means.empty else pd.concat(
+                [self.means.drop(affected, errors='ignore'), means]).sort_index()
+
+            scores = self.means['Threat_Actor_Score'].dropna()
+            bounds = (scores.min(), scores.max()) if len(scores) else (None, None)
+            if bounds != (self.min_score, self.max_score):
+                self.min_score, self.max_score = bounds
+                return set(self.means.index)
+        return set(affected)
+
+    # Score record of an APT, a row of the table as a dict (None for an unknown APT)
+    def record(self, apt):
+        with self._lock:
+            if apt not in self.means.index:
+                return None
+            record = self.means.loc[apt].to_dict()
+            percentage = self._percentages(np.array([record['Threat_Actor_Score']]))
+        record['Number_of_Techniques_Used'] = int(record['Number_of_Techniques_Used'])
+        record['Threat_Actor_Score_Percentage'] = float(percentage[0])
+        record['Threat_Actor_Category'] = str(categorize_scores(percentage)[0])
+        return record
+
+    def apts(self):
+        with self._lock:
+            return list(self.means.index)
+
+    # The whole table, laid out like compute_threat_actor_scores
+    def table(self):
+        with self._lock:
+            table = self.means.rename_axis('apt').reset_index()
+            table['Threat_Actor_Score_Percentage'] = self._percentages(table['Threat_Actor_Score'].to_numpy())
+        table['Number_of_Techniques_Used'] = table['Number_of_Techniques_Used'].astype(int)
+        table['Threat_Actor_Category'] = categorize_scores(table['Threat_Actor_Score_Percentage'])
+        return table
+
+    # Scores as percentages of the (padded) min/max range, as in compute_threat_actor_scores
+    def _percentages(self, scores):
+        if self.min_score is None:
+            return np.full(len(scores), np.nan)
+        min_score, max_score = self.min_score - 1, self.max_score + 1
+        return np.round(((scores - min_score) / (max_score - min_score)) * 100, 2)
+
+
+# Rounded per-APT means from the running sums and technique counts (see ThreatActorScoreState)
+def _means(sums, technique_counts):
+    n = np.asarray(technique_counts, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        c = np.where(sums['c_rows'] > 0, sums['c'] / sums['c_rows'], np.nan)
+        p = np.where(sums['p_rows'] > 0, sums['p'] / sums['p_rows'], np.nan)
+        score = np.where(sums['score_rows'] > 0, (n * sums['score_p'] + sums['cp']) / sums['score_rows'], np.nan)
+    return pd.DataFrame({
+        'Number_of_Techniques_Used': n,
+        'Complexity': np.round(n + c, 2),
+        'Prevalence': np.round(p, 2),
+        'Threat_Actor_Score': np.round(score, 2),
+    }, index=sums.index)
+
+
+# What ThreatActorScoreState needs from a batch of rows: the per-APT partial sums and the distinct
+# (apt, technique-id) pairs
+def summarize_rows(df):
+    df = df[df['apt'].notna()]
+    techniques = df[['apt', 'technique-id']].dropna().drop_duplicates()
+    return _partial_sums(df), techniques
+
+
+# Per-APT sums of c, p and c * p over new rows. NaNs are skipped like groupby().mean() skips them:
+# Complexity and Prevalence average over the rows where they exist, the score over rows where both do.
+def _partial_sums(df):
+    weights = _weights(df)
+    c = weights['platform-count'] + weights['tactic-weight']
+    p = (weights['region-weight'] + weights['impact-score'] + weights['cvss-base-score'] + weights['ioc-weight'] +
+         integrate_time(weights['time']))
+    both = c.notna() & p.notna()
+    sums = pd.DataFrame({
+        'c': c.fillna(0), 'c_rows': c.notna(),
+        'p': p.fillna(0), 'p_rows': p.notna(),
+        'score_p': p.where(both, 0), 'cp': (c * p).where(both, 0), 'score_rows': both,
+    }).astype(float)
+    sums = sums.groupby(df['apt'], observed=True).sum()
+    sums.index = sums.index.astype(object)  # Batches of plain strings are merged into the same sums
+    return sums
@@ -0,0 +1,73 @@
+import os
+from bisect import bisect_left
+
+import flask
+import numpy as np
+
+# Options returned per search (the dropdowns ship without options and load the matches of what is typed)
+search_limit = int(os.environ.get('DROPDOWN_SEARCH_LIMIT', 50))
+max_search_limit = 500
+
+# Indexes served by the search route: name -> function returning the current index of that name
+searchable = {}
+
+
+# Case-insensitive search index of dropdown options ({'label', 'value'} dicts) over their labels:
+# the sorted labels for prefix search and, for substring search, the options containing each trigram
+def build_search_index(options):
+    keys = [str(option['label']).lower() for option in options]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    trigrams = {}
+    for position, key in enumerate(keys):
+        for trigram in {key[start:start + 3] for start in range(len(key) - 2)}:
+            trigrams.setdefault(trigram, []).append(position)
+    return {'options': options, 'keys': keys, 'order': order, 'sorted_keys': [keys[position] for position in order],
+            'trigrams': {trigram: np.array(positions) for trigram, positions in trigrams.items()},
+            'values': {option['value']: position for position, option in enumerate(options)}}
+
+
+# Positions of the options matching a query, best first: labels starting with it (alphabetically),
+# then, for queries of three characters or more, the other labels containing it (in option order)
+def search_positions(index, query, limit=search_limit):
+    query = query.strip().lower()
+    if not query or limit <= 0:
+        return []
+    matches = []
+    sorted_keys = index['sorted_keys']
+    start = bisect_left(sorted_keys, query)
+    while start < len(sorted_keys) and len(matches) < limit and sorted_keys[start].startswith(query):
+        matches.append(index['order'][start])
+        start += 1
+    if len(matches) < limit and len(query) >= 3:
+        postings = sorted((index['trigrams'].get(query[i:i + 3]) for i in range(len(query) - 2)),
+                          key=lambda positions: 0 if positions is None else len(positions))
+        if postings[0] is not None:
+            candidates = postings[0]
+            for positions in postings[1:]:
+                candidates = np.intersect1d(candidates, positions, assume_unique=True)
+            keys = index['keys']
+            for position in candidates.tolist():
+                if not keys[position].startswith(query) and query in keys[position]:
+                    matches.append(position)
+                    if len(matches) == limit:
+                        break
+    return matches
+
+
+# Options of a searchable dropdown: the selected value(s) (so the dropdown can still show them), then
+# the top matches of what is typed
+def search_options(index, query, selected=None, limit=search_limit):
+    selected = [] if selected is None else selected if isinstance(selected, list) else [selected]
+    positions = [index['values'][value] for value in selected if value in index['values']]
+    positions += search_positions(index, query or '', limit)
+    return [index['options'][position] for position in dict.fromkeys(positions)]
+
+
+# GET /search/<name>?q=...&limit=...: the options of an index matching q, as JSON
+def search_routes(server):
+    @server.route('/search/<name>')
+    def search_route(name):
+        if name not in searchable:
+            flask.abort(404)
+        limit = min(flask.request.args.get('limit', search_limit, type=int), max_search_limit)
+        return flask.jsonify(search_options(searchable[name](), flask.request.args.get('q', ''), limit=limit))
@@ -1,7 +1,17 @@
+import hashlib
+import json
+import os
+import threading
+
 import dash_bootstrap_components as dbc
+import flask
 from dash import html, dcc
-from diagram.Top10AptPieChart import create_pie_chart
-from diagram.AptRegionHeatMap import create_region_map
+import pandas as pd
+from diagram.Top10AptPieChart import create_top_apt_pie_chart
+from dataset import file_version
+from instrumentation import span
+from geometry import default_level, geometry_dir, geometry_path, shapefile_path as default_shapefile_path
+from summary_metrics import SummaryMetrics
 
 # Define colors (same as in main app for consistency)
 colors = {
@@ -10,29 +20,59 @@ colors = {
 }
 
 
-def summary_layout(df, shapefile_path='ne_10m_admin_0_countries/ne_10m_admin_0_countries.shp'):
-    # Split 'platforms' into separate rows
-    df['platforms'] = df['platforms'].fillna('')  # Replace NaNs with empty strings
-    df_expanded = df.assign(platform=df['platforms'].str.split(',')).explode('platform')
-    df_expanded['platform'] = df_expanded['platform'].str.strip()
+# URL of the region map page for a 'region' / 'region_count' frame. The page only depends on these counts, the
+# shapefile and the simplification level, so it is rendered once per combination and served from
+# .cache/geometry by summary_routes(), instead of inlining the whole map into every Summary layout.
+def region_map_src(region_frequency, shapefile_path=default_shapefile_path, level=default_level):
+    region_counts = zip(region_frequency['region'], region_frequency['region_count'])
+    digest = hashlib.sha1(json.dumps({str(region): int(count) for region, count in region_counts},
+                                     sort_keys=True).encode('utf-8'))
+    digest.update(f"{os.path.abspath(shapefile_path)}\0{file_version(shapefile_path)}\0{level}".encode('utf-8'))
+    name = f"region-map-{digest.hexdigest()[:20]}.html"
 
-    # Calculate key metrics
-    total_platforms = df_expanded['platform'].nunique()
-    total_apts = df['apt'].nunique()
+    page = geometry_path(name)
+    if not os.path.exists(page):
+        from diagram.AptRegionHeatMap import create_region_count_map  # folium is slow to import
+        with span('build', 'create_region_count_map'):
+            region_map = create_region_count_map(region_frequency, shapefile_path=shapefile_path, level=level)
+        with span('serialize', 'create_region_count_map'):
+            html_page = region_map.get_root().render()
+        tmp_page = f"{page}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_page, 'w', encoding='utf-8') as f:
+            f.write(html_page)
+        os.replace(tmp_page, page)
+    return f"/region-map/{name}"
+
+
+# Serve the cached region map pages. Their names change with their content, so browsers may keep them.
+def summary_routes(server):
+    @server.route('/region-map/<name>')
+    def region_map_page(name):
+        return flask.send_from_directory(os.path.abspath(geometry_dir), name, max_age=7 * 24 * 3600)
 
-    # Get the Top 10 APT pie chart by calling the function
-    top_10_apt_pie_chart = create_pie_chart(df)
 
-    # Remove 'UNKNOWN' values before calculating most vulnerable CVE and CWE
-    df_filtered = df[(df['cve'] != 'UNKNOWN') & (df['cwe-id'] != 'UNKNOWN')]
-    most_vulnerable_cve = df_filtered['cve'].value_counts().idxmax()
-    most_vulnerable_cwe = df_filtered['cwe-id'].value_counts().idxmax()
+# Summary tab content, built from the running metrics of the dataset (a SummaryMetrics, or a frame
+# to compute them from) and reused until rows are appended, so switching tabs does no DataFrame work
+def summary_layout(metrics, shapefile_path=default_shapefile_path):
+    if isinstance(metrics, pd.DataFrame):
+        metrics = SummaryMetrics(metrics)
+    return metrics.cached(('summary_layout', shapefile_path), lambda: _summary_layout(metrics, shapefile_path))
 
-    # Create the folium map using the create_region_map function
-    folium_map = create_region_map(df, shapefile_path=shapefile_path)
 
-    # Convert the folium map to an HTML representation
-    map_html = folium_map._repr_html_()
+def _summary_layout(metrics, shapefile_path):
+    # Calculate key metrics ('UNKNOWN' CVEs and CWEs are not counted)
+    kpis = metrics.kpis()
+    most_vulnerable_cve = kpis['most_vulnerable_cve']
+    most_vulnerable_cwe = kpis['most_vulnerable_cwe']
+    total_platforms = kpis['total_platforms']
+    total_apts = kpis['total_apts']
+
+    # Get the Top 10 APT pie chart by calling the function
+    with span('build', 'create_top_apt_pie_chart'):
+        top_10_apt_pie_chart = create_top_apt_pie_chart(metrics.top_apts(10))
+
+    # Page of the folium map built by create_region_count_map
+    map_src = region_map_src(metrics.region_frequency(), shapefile_path=shapefile_path)
 
     return dbc.Container([
         html.H2('Summary Overview', style={'textAlign': 'center', 'color': colors['text']}),
@@ -59,7 +99,7 @@ def summary_layout(df, shapefile_path='ne_10m_admin_0_countries/ne_10m_admin_0_c
 
         # Folium Map and Pie Chart for top 10 APT
         dbc.Row([
-            dbc.Col(html.Iframe(srcDoc=map_html, width='100%', height='600'), width=8,
+            dbc.Col(html.Iframe(src=map_src, width='100%', height='600'), width=8,
                     style={'border': '1px solid #ddd', 'padding': '10px', 'border-radius': '5px',
                            'box-shadow': '2px 2px 5px rgba(0,0,0,0.1)', 'margin-bottom': '10px'}),
 
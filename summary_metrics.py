@@ -0,0 +1,81 @@
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from platform_table import build_platform_table
+
+
+# Running counts behind the Summary tab KPIs (most common CVE/CWE, number of platforms and APTs,
+# top APTs by techniques, APTs per region). They are built once per dataset, updated in place when
+# rows are appended, and anything derived from them (the tab layout) is memoized per revision.
+class SummaryMetrics:
+    def __init__(self, df=None):
+        self.rows = 0
+        self.revision = 0
+        self.version = None
+        self.platform_counts = Counter()  # platform -> rows
+        self.apt_techniques = {}  # apt -> set of technique ids
+        self.region_counts = Counter()  # region -> rows
+        self.cve_counts = Counter()  # CVE -> rows with a known CVE and CWE
+        self.cwe_counts = Counter()  # CWE -> rows with a known CVE and CWE
+        self._derived = {}
+        self._lock = threading.Lock()
+        if df is not None:
+            self.append(df)
+
+    # Fold new rows into the counts
+    def append(self, df):
+        # Rows per platform (NaNs count as an empty platform, like fillna(''))
+        platforms = build_platform_table(df)['platform']
+
+        # Remove 'UNKNOWN' values before counting CVEs and CWEs
+        known = df[(df['cve'] != 'UNKNOWN') & (df['cwe-id'] != 'UNKNOWN')]
+
+        with self._lock:
+            self.platform_counts.update(platforms.value_counts(sort=False).to_dict())
+            for apt, technique in zip(df['apt'], df['technique-id']):
+                if pd.isna(apt):
+                    continue
+                techniques = self.apt_techniques.setdefault(apt, set())
+                if not pd.isna(technique):
+                    techniques.add(technique)
+            region_counts = df['region'].value_counts(sort=False)
+            self.region_counts.update(region_counts[region_counts > 0].to_dict())  # Categoricals count every region
+            # Counter keeps first-seen order, so ties resolve to the value that appeared first
+            self.cve_counts.update(known['cve'].dropna())
+            self.cwe_counts.update(known['cwe-id'].dropna())
+            self.rows += len(df)
+            self.revision += 1
+            self._derived.clear()
+
+    # Memoize build() until the next append
+    def cached(self, key, build):
+        with self._lock:
+            revision = self.revision
+            if key in self._derived:
+                return self._derived[key]
+        value = build()
+        with self._lock:
+            if self.revision == revision:
+                self._derived[key] = value
+        return value
+
+    def kpis(self):
+        return {
+            'most_vulnerable_cve': self.cve_counts.most_common(1)[0][0],
+            'most_vulnerable_cwe': self.cwe_counts.most_common(1)[0][0],
+            'total_platforms': len(self.platform_counts),
+            'total_apts': len(self.apt_techniques),
+        }
+
+    # APTs with the most distinct techniques, as the 'apt' / 'Technique Count' frame of the pie chart
+    # (ties go to the alphabetically first APT, like nlargest on the groupby result)
+    def top_apts(self, n=10):
+        counts = sorted(((apt, len(techniques)) for apt, techniques in self.apt_techniques.items()),
+                        key=lambda item: (-item[1], item[0]))
+        return pd.DataFrame(counts[:n], columns=['apt', 'Technique Count'])
+
+    # Rows per region, as the 'region' / 'region_count' frame of the region map
+    def region_frequency(self):
+        return pd.DataFrame(sorted(self.region_counts.items()), columns=['region', 'region_count'])
@@ -0,0 +1,451 @@
+from dash import dcc, html
+from dash.dependencies import ClientsideFunction, Input, Output, State
+import pandas as pd
+import dash_bootstrap_components as dbc
+import figure_cache
+import render_pool
+from figure_cache import cached_figure, figure_key, load_figure, render_json
+from filter_index import build_filter_index, facet_counts, filter_rows, value_codes
+from instrumentation import span
+from search_index import build_search_index, search_options, searchable
+from graph_index import build_graph_index, scoped_index
+from platform_table import build_platform_table, platform_names
+from cooccurrence import build_cooccurrence
+from registry import dataset_registry
+
+from diagram.CVECWEScatterPlot import create_cve_cwe_scatter_plot
+from diagram.CWEPlatformHeatmap import create_cwe_platform_heatmap
+from diagram.CVECWEBarChart import create_cve_cwe_bar_chart
+from diagram.AptPlatformStackedBarChart import create_apt_platform_stacked_bar_chart
+from diagram.CVETechniquesHeatmap import create_cve_technique_heatmap
+from diagram.Apt36AssociatedTechniques import create_apt_network_techniques
+from diagram.Apt36AssociatedTechniquesTactics import create_apt_network_techniques_tactics
+from diagram.Apt36AssociatedTechniquesTactics_2 import create_apt_network_techniques_tactics_cve
+from diagram.AptCVEBubbleChart import create_bubble_chart_apt_cvss
+from diagram.AptCVEHeatMap import create_heatmap_apt_cvss
+from diagram.PlatformIoCStackedBarChart import create_platform_ioc_stacked_bar_chart
+from diagram.APTTechniqueTacticChart import create_techniques_tactics_chart
+
+# The dataset (shared with the other tabs, including ingested rows). Every render reads the current
+# snapshot, whose version keys the figure cache.
+excel = 'VisualAmended_v9.xlsx'
+data_sheet = 'CleanedDataset'
+registry = dataset_registry(excel, data_sheet, live=True)
+
+
+def _scatter_rows(snapshot):
+    df_scatter = snapshot.df[['cve', 'cwe-id', 'cvss-base-score']].dropna()
+    df_scatter['cwe_num'] = pd.factorize(df_scatter['cwe-id'])[0]
+    return df_scatter
+
+
+# Dropdown options of the tab
+def _visual_options(snapshot):
+    df = snapshot.df
+    return {
+        'cve': [{'label': cve, 'value': cve} for cve in df['cve'].unique()],
+        'apt': [{'label': apt, 'value': apt} for apt in df['apt'].unique()],
+        'cwe': [{'label': cwe, 'value': cwe} for cwe in df['cwe-id'].unique()],
+        'platform': [{'label': platform, 'value': platform} for platform in platform_names(snapshot['platforms'])],
+        'technique': [{'label': technique, 'value': technique} for technique in df['technique-id'].unique()],
+    }
+
+
+registry.register('scatter_rows', _scatter_rows)
+# Row -> platform bridge table shared by the platform figures
+registry.register('platforms', lambda snapshot: build_platform_table(snapshot.df))
+# Adjacency of the network graphs; its version lets them cache their layout per snapshot
+registry.register('graph_index', lambda snapshot: dict(build_graph_index(snapshot.df), version=snapshot.version))
+registry.register('cve_technique', lambda snapshot: build_cooccurrence(snapshot.df, 'cve', 'technique-id'))
+registry.register('visual_options', _visual_options)
+# Row bitmaps of the filter dropdowns' values, which resolve any combination of selections at once and
+# count the rows left behind each option (the platforms come from the bridge table, a row has several)
+filter_dimensions = {'cve': 'cve', 'apt': 'apt', 'cwe': 'cwe-id', 'technique': 'technique-id'}
+registry.register('filter_index', lambda snapshot: build_filter_index(snapshot.df, filter_dimensions,
+                                                                      {'platform': snapshot['platforms']}))
+registry.register('scatter_filter_index', lambda snapshot: build_filter_index(snapshot['scatter_rows'], {'cve': 'cve'}))
+
+colors = {
+    'background': '#f9f9f9',
+    'text': '#333333'
+}
+
+graph_style = {'border': '1px solid #ddd', 'padding': '10px', 'border-radius': '5px',
+               'box-shadow': '2px 2px 5px rgba(0,0,0,0.1)', 'margin-bottom': '10px'}
+left_style = {**graph_style, 'width': '49%', 'margin-right': '1%'}
+right_style = {**graph_style, 'width': '49%', 'margin-left': '1%'}
+
+
+# Keep the rows matching the selected values of each filter dimension (all rows if nothing is selected),
+# e.g. _select(snapshot, cve=selected_cves, technique=selected_technique)
+def _select(snapshot, **selections):
+    return filter_rows(snapshot['filter_index'], snapshot.df, selections)
+
+
+# Dropdown of each filter dimension
+filter_dropdowns = {'cve': 'cve-filter-dropdown', 'apt': 'apt-filter-dropdown', 'cwe': 'cwe-filter-dropdown',
+                    'platform': 'platform-selection-dropdown', 'technique': 'technique-selection-dropdown'}
+
+# Dropdowns too long to list: they ship without options and load the matches of what is typed
+# (also served as /search/<dropdown id>). The dozen platforms are listed in full.
+searched_dimensions = ['cve', 'apt', 'cwe', 'technique']
+registry.register('filter_search', lambda snapshot: {
+    name: build_search_index(snapshot['visual_options'][name]) for name in searched_dimensions})
+for _name in searched_dimensions:
+    searchable[filter_dropdowns[_name]] = lambda name=_name: registry.current()['filter_search'][name]
+
+
+# Options of a dropdown labelled with the number of rows they would leave given the selections of the
+# other dropdowns ({dimension: selected values}). Options leaving no row are disabled, unless selected,
+# so they can still be removed.
+def filter_options(snapshot, name, selections, options):
+    index = snapshot['filter_index']
+    counts = facet_counts(index, selections, [name])[name]
+    option_counts = counts[value_codes(index, name, [option['value'] for option in options])].tolist()
+    selected = set(selections.get(name) or ())
+    return [{'label': f"{option['label']} ({count})", 'value': option['value'],
+             'disabled': count == 0 and option['value'] not in selected}
+            for option, count in zip(options, option_counts)]
+
+
+# Options of the dropdown of a dimension: the matches of what is typed (every platform) plus the selected
+# values, with their facet counts in the group shown (see facet_scopes). selections holds the values of
+# the dropdowns the counts depend on, {dimension: selected values}. Runs on every keystroke and whenever
+# one of those selections changes.
+def dropdown_options(name, search_value, selections, group=None):
+    snapshot = registry.current()
+    if name in searched_dimensions:
+        options = search_options(snapshot['filter_search'][name], search_value, selections[name])
+    else:
+        options = snapshot['visual_options'][name]
+    scopes = facet_scopes[name]
+    scope = scopes[group] if group in scopes else next(iter(scopes.values())) if len(scopes) == 1 else set()
+    with span('facets', filter_dropdowns[name]):
+        return filter_options(snapshot, name, {other: selections[other] for other in scope | {name}}, options)
+
+
+# Dropdowns the options of a dimension depend on, besides its search: its own value (the selected values
+# stay listed and enabled) and the dimensions its counts depend on in any group. A dimension shown in
+# several groups also depends on the group.
+def _options_dimensions(name):
+    scope = set().union(*facet_scopes[name].values())
+    return [name] + [other for other in filter_dropdowns if other in scope], len(facet_scopes[name]) > 1
+
+
+def _options_callback(name):
+    dimensions, grouped = _options_dimensions(name)
+
+    def update(*args):
+        search_value, args = (args[0], args[1:]) if name in searched_dimensions else (None, args)
+        group, args = (args[-1], args[:-1]) if grouped else (None, args)
+        return dropdown_options(name, search_value, dict(zip(dimensions, args)), group)
+
+    return update
+
+
+# Arguments of each figure builder, from a snapshot and the values of the figure's dropdowns:
+# function(snapshot, *dropdown values) -> (args, kwargs)
+
+# CVE-related figures, filtered on the CVE and technique dropdowns
+def _cve_bar_chart(snapshot, selected_cves, selected_technique):
+    return (_select(snapshot, cve=selected_cves, technique=selected_technique),), {}
+
+
+def _cve_scatter_plot(snapshot, selected_cves):
+    return (filter_rows(snapshot['scatter_filter_index'], snapshot['scatter_rows'], {'cve': selected_cves}),), {}
+
+
+# The heatmap reads the precomputed sparse CVE x technique matrix and applies both filters itself
+def _cve_technique_heatmap(snapshot, selected_cves, selected_technique):
+    return (snapshot.df, selected_technique), {'cooccurrence': snapshot['cve_technique'], 'selected_cves': selected_cves}
+
+
+# APT-related figures, filtered on the APT dropdown (only the stacked bar chart uses the platforms)
+def _apt_platform_stacked_bar_chart(snapshot, selected_apts, selected_platforms):
+    return ((_select(snapshot, apt=selected_apts), selected_apts, selected_platforms),
+            {'platforms': snapshot['platforms']})
+
+
+def _apt_figure(snapshot, selected_apts):
+    return (_select(snapshot, apt=selected_apts), selected_apts), {}
+
+
+# The network graphs read the precomputed graph index, narrowed to the selected APTs
+def _apt_network(snapshot, selected_apts):
+    index = scoped_index(snapshot['graph_index'], selected_apts)
+    return (_select(snapshot, apt=selected_apts), selected_apts), {'index': index}
+
+
+# CWE-related figures, filtered on the CWE and platform dropdowns (the builders pick the platforms)
+def _cwe_platform_heatmap(snapshot, selected_cwes, selected_platforms):
+    return ((_select(snapshot, cwe=selected_cwes), selected_cwes, selected_platforms),
+            {'platforms': snapshot['platforms']})
+
+
+def _platform_ioc_stacked_bar_chart(snapshot, selected_cwes, selected_platforms):
+    return (_select(snapshot, cwe=selected_cwes), selected_platforms), {'platforms': snapshot['platforms']}
+
+
+# The CWE scatter plot ignores every filter, so it is rendered once per snapshot and placed directly in the layout
+def cwe_scatter_plot():
+    snapshot = registry.current()
+    return cached_figure(create_cve_cwe_scatter_plot, ((),), snapshot.version, snapshot['scatter_rows'])
+
+
+# Every filtered figure: graph id -> (dropdowns it depends on, builder, arguments of the builder).
+# Each figure gets its own callback, so a dropdown change only re-renders the figures that use it.
+visual_figures = {
+    'cve-technique-heatmap': (['cve-filter-dropdown', 'technique-selection-dropdown'], create_cve_technique_heatmap,
+                              _cve_technique_heatmap),
+    'cve-cwe-bar-chart': (['cve-filter-dropdown', 'technique-selection-dropdown'], create_cve_cwe_bar_chart,
+                          _cve_bar_chart),
+    'cve-cwe-scatter-plot': (['cve-filter-dropdown'], create_cve_cwe_scatter_plot, _cve_scatter_plot),
+    'apt-platform-stacked-bar-chart': (['apt-filter-dropdown', 'platform-selection-dropdown'],
+                                       create_apt_platform_stacked_bar_chart, _apt_platform_stacked_bar_chart),
+    'apt-technique-tactic-network': (['apt-filter-dropdown'], create_apt_network_techniques_tactics, _apt_network),
+    'apt-technique-tactic-cve-network': (['apt-filter-dropdown'], create_apt_network_techniques_tactics_cve,
+                                         _apt_network),
+    'apt-technique-tactic-chart': (['apt-filter-dropdown'], create_techniques_tactics_chart, _apt_figure),
+    'apt-technique-network': (['apt-filter-dropdown'], create_apt_network_techniques, _apt_network),
+    'apt-cvss-heatmap': (['apt-filter-dropdown'], create_heatmap_apt_cvss, _apt_figure),
+    'apt-cvss-bubble-chart': (['apt-filter-dropdown'], create_bubble_chart_apt_cvss, _apt_figure),
+    'cwe-platform-heatmap': (['cwe-filter-dropdown', 'platform-selection-dropdown'], create_cwe_platform_heatmap,
+                             _cwe_platform_heatmap),
+    'platform-ioc-stacked-bar-chart': (['cwe-filter-dropdown', 'platform-selection-dropdown'],
+                                       create_platform_ioc_stacked_bar_chart, _platform_ioc_stacked_bar_chart),
+}
+
+
+# Filtered figures of each group (the graphs of group_layouts)
+figure_groups = {
+    'cve': ['cve-technique-heatmap', 'cve-cwe-bar-chart', 'cve-cwe-scatter-plot'],
+    'apt': ['apt-platform-stacked-bar-chart', 'apt-technique-tactic-network', 'apt-technique-tactic-cve-network',
+            'apt-technique-tactic-chart', 'apt-technique-network', 'apt-cvss-heatmap', 'apt-cvss-bubble-chart'],
+    'cwe': ['cwe-platform-heatmap', 'platform-ioc-stacked-bar-chart'],
+}
+
+
+# The dimensions the facet counts of each dimension are conditioned on, per group showing its dropdown:
+# {dimension: {group: dimensions}}. Those combined with it by every figure of the group it filters, so an
+# option is only disabled when none of the figures would show a row for it (the APT group's figures
+# other than the stacked bar chart ignore the platforms: APT options do not depend on them).
+def _facet_scopes():
+    dimensions = {dropdown_id: name for name, dropdown_id in filter_dropdowns.items()}
+    scopes = {}
+    for group, graph_ids in figure_groups.items():
+        for graph_id in graph_ids:
+            names = {dimensions[dropdown_id] for dropdown_id in visual_figures[graph_id][0]}
+            for name in names:
+                group_scopes = scopes.setdefault(name, {})
+                group_scopes[group] = group_scopes.get(group, names) & (names - {name})
+    return scopes
+
+
+facet_scopes = _facet_scopes()
+
+
+# JSON of a figure of the table, built from a snapshot: in a render worker, or here when the pool is off
+def render_visual_figure(snapshot, graph_id, values):
+    _, builder, arguments = visual_figures[graph_id]
+    args, kwargs = arguments(snapshot, *values)
+    return render_json(builder, *args, **kwargs)
+
+
+# A figure of the current snapshot, from the figure cache or rendered by the pool. The figures of a
+# group arrive as concurrent callbacks, so the pool builds them side by side.
+def visual_figure(graph_id, *values):
+    snapshot = registry.current()
+    builder = visual_figures[graph_id][1]
+    key = figure_key(builder, values, snapshot.version)
+    figure_json = figure_cache.figure_cache.get(key)
+    if figure_json is None:
+        with span('render', graph_id):
+            figure_json = render_pool.render(render_visual_figure, snapshot, graph_id, values)
+        figure_cache.figure_cache.put(key, figure_json)
+    return load_figure(builder, figure_json)
+
+
+def _figure_callback(graph_id):
+    def update(*values):
+        return visual_figure(graph_id, *values)
+
+    return update
+
+
+# Start the render workers with the current snapshot, and hand them every new one as it is swapped in
+def warm_up_render_pool():
+    render_pool.warm_up(__name__, registry.current())
+    registry.listeners.append(lambda snapshot: render_pool.warm_up(__name__, snapshot))
+
+
+# Layout of the Visualisation tab
+def visual_layout():
+    snapshot = registry.current()
+    return html.Div([
+        html.H2("Visualization Dashboard", style={'textAlign': 'center', 'color': colors['text']}),
+
+        html.Div([
+            html.Button('CVE-Related Visualizations', id='cve-button', n_clicks=0, className='btn-hover',
+                        style={'margin-right': '10px'}),
+            html.Button('APT-Related Visualizations', id='apt-button', n_clicks=0, className='btn-hover',
+                        style={'margin-right': '10px'}),
+            html.Button('CWE-Related Visualizations', id='cwe-button', n_clicks=0, className='btn-hover',
+                        style={'margin-right': '10px'})
+        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'margin': '20px'}),
+
+        # Dropdowns for filtering (hidden by default, shown based on selection)
+        html.Div([dcc.Dropdown(id="cve-filter-dropdown",
+                               options=[],  # Loaded as the user types
+                               multi=True, placeholder="Select CVE (type to search)"),
+                  dbc.Tooltip(
+                      "Select multiple CVEs for filtering",
+                      target="cve-filter-dropdown",
+                      placement="bottom"
+                  )], style={'display': 'none', 'margin-bottom': '20px', 'margin-top': '10px'},
+                 id='cve-filter-container'),
+
+        html.Div([dcc.Dropdown(id="apt-filter-dropdown",
+                               options=[],
+                               multi=True, placeholder="Select APT (type to search)"), dbc.Tooltip(
+            "Select multiple CWEs for filtering",
+            target="apt-filter-dropdown",
+            placement="bottom"
+        )], style={'display': 'none', 'margin-bottom': '20px', 'margin-top': '10px'},
+                 id='apt-filter-container'),
+
+        html.Div([dcc.Dropdown(id="cwe-filter-dropdown",
+                               options=[],
+                               multi=True, placeholder="Select CWE (type to search)"), dbc.Tooltip(
+            "Select multiple APTs for filtering",
+            target="cwe-filter-dropdown",
+            placement="bottom"
+        )], style={'display': 'none', 'margin-bottom': '20px', 'margin-top': '10px'},
+                 id='cwe-filter-container'),
+
+        html.Div([dcc.Dropdown(id="platform-selection-dropdown",
+                               options=filter_options(snapshot, 'platform', {}, snapshot['visual_options']['platform']),
+                               multi=True, placeholder="Select Platform")],
+                 style={'display': 'none'}, id='platform-filter-container'),
+
+        html.Div([
+            dcc.Dropdown(
+                id="technique-selection-dropdown",
+                options=[],
+                multi=True,
+                placeholder="Select technique (type to search)"
+            )
+        ], style={'display': 'none'}, id='technique-filter-container'),
+
+        # Visual content container, filled with the graphs of the group picked with the buttons
+        dcc.Store(id='visual-group'),
+        html.Div(id='visual-content'),
+
+    ], style={
+        'padding': '10px'  # Add padding if necessary
+    })
+
+
+# Containers of each group; the graphs start empty and are filled by their own callbacks
+def cve_group_layout():
+    return dbc.Container([
+        html.H3('CVE-Related Visualizations',
+                style={'textAlign': 'center', 'color': colors['text'], 'margin': '20px'}),
+
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='cve-technique-heatmap'), width=12, style=graph_style)
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='cve-cwe-bar-chart'), width=6, style=left_style),
+            dbc.Col(dcc.Graph(id='cve-cwe-scatter-plot'), width=6, style=right_style),
+        ]),
+
+    ], fluid=True, style={'margin-bottom': '20px'})
+
+
+def apt_group_layout():
+    return dbc.Container([
+        html.H3("APT-Related Visualizations",
+                style={'textAlign': 'center', 'color': colors['text'], 'margin': '20px'}),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='apt-platform-stacked-bar-chart'), width=6, style=left_style),
+            dbc.Col(dcc.Graph(id='apt-technique-tactic-network'), width=6, style=right_style),
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='apt-technique-tactic-cve-network'), width=6, style=left_style),
+            dbc.Col(dcc.Graph(id='apt-technique-tactic-chart'), width=6, style=right_style),
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='apt-technique-network'), width=12, style=graph_style),
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='apt-cvss-heatmap'), width=6, style=left_style),
+            dbc.Col(dcc.Graph(id='apt-cvss-bubble-chart'), width=6, style=right_style),
+        ])
+    ], fluid=True, style={'margin-bottom': '20px'})
+
+
+def cwe_group_layout():
+    return dbc.Container([
+        html.H3('CWE-Related Visualizations',
+                style={'textAlign': 'center', 'color': colors['text'], 'margin': '20px'}),
+
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='cwe-platform-heatmap'), width=6, style=left_style),
+            dbc.Col(dcc.Graph(id='cwe-cve-scatter-plot', figure=cwe_scatter_plot()), width=6, style=right_style),
+        ]),
+
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='platform-ioc-stacked-bar-chart'), width=12, style=graph_style)
+        ])
+    ], fluid=True, style={'margin-bottom': '20px'})
+
+
+group_layouts = {'cve': cve_group_layout, 'apt': apt_group_layout, 'cwe': cwe_group_layout}
+
+
+# Register callbacks for the visualisation tab
+def visual_callbacks(app):
+    # Buttons pick the group, in the browser (assets/clientside.js): it shows the group's dropdowns and
+    # keeps the group in visual-group, which changes only when another group is picked
+    app.clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='visual_group'),
+        [Output('visual-group', 'data'),
+         Output('cve-filter-container', 'style'),
+         Output('apt-filter-container', 'style'),
+         Output('cwe-filter-container', 'style'),
+         Output('platform-filter-container', 'style'),
+         Output('technique-filter-container', 'style')],
+        [Input('cve-button', 'n_clicks'),
+         Input('apt-button', 'n_clicks'),
+         Input('cwe-button', 'n_clicks')],
+        State('visual-group', 'data')
+    )
+
+    # A new group inserts its (empty) graphs, whose own callbacks then render them
+    @app.callback(
+        Output('visual-content', 'children'),
+        Input('visual-group', 'data'),
+        prevent_initial_call=True
+    )
+    def update_visual_content(group):
+        return group_layouts[group]() if group in group_layouts else html.Div()
+
+    # Options of each dropdown: reloaded as the user types in it (searched dropdowns) and relabelled
+    # with the facet counts whenever a selection they depend on changes (or the group, for the platforms)
+    for name, dropdown_id in filter_dropdowns.items():
+        dimensions, grouped = _options_dimensions(name)
+        search = [Input(dropdown_id, 'search_value')] if name in searched_dimensions else []
+        group = [Input('visual-group', 'data')] if grouped else []
+        app.callback(
+            Output(dropdown_id, 'options'),
+            search + [Input(filter_dropdowns[other], 'value') for other in dimensions] + group,
+            prevent_initial_call=True
+        )(_options_callback(name))
+
+    # One callback per figure, subscribed only to the dropdowns that figure uses.
+    # Dash fires them when the group's graphs are inserted and again when one of their dropdowns changes.
+    for graph_id, (dropdown_ids, _, _) in visual_figures.items():
+        app.callback(
+            Output(graph_id, 'figure'),
+            [Input(dropdown_id, 'value') for dropdown_id in dropdown_ids]
+        )(_figure_callback(graph_id))